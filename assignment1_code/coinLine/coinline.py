@@ -1,5 +1,22 @@
 # coinline.py
 
+import math
+import time
+from collections import OrderedDict
+
+# default bound on the coin lines a MinimaxSolver remembers
+DEFAULT_TT_ENTRIES = 1 << 20
+
+# polynomial hash of coin segments (MinimaxSolver keys): a Mersenne prime modulus
+_HASH_MOD = (1 << 61) - 1
+_HASH_BASE = 0x5DEECE66D
+
+# transposition-table bound flags of AlphaBetaSolver entries
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# seconds an IterativeDeepeningSolver may spend on one move
+DEFAULT_TIME_BUDGET = 0.5
+
 class State:
     def __init__(self, coins, pScore=0, aiScore=0, turn='player'): 
         self.coins = coins
@@ -190,4 +207,473 @@ def minimax(state, is_maximizing):
     return result
 
 
-    
\ No newline at end of file
+    
+
+"""
+Returns the same (value, action) as minimax, by dynamic programming over intervals of
+the remaining coins instead of a search over full states.
+
+Once the scores so far are set aside, a position is just the interval of coins left:
+D[lo][hi] = the best (mover's total - opponent's total) still to be collected from
+coins[lo..hi] is the same whoever moves and whatever the scores are, and
+
+    D[lo][hi] = max(coins[lo]                - D[lo+1][hi],     # L1
+                    coins[hi]                - D[lo][hi-1],     # R1
+                    coins[lo] + coins[lo+1]  - D[lo+2][hi],     # L2
+                    coins[hi-1] + coins[hi]  - D[lo][hi-2])     # R2
+
+The table is filled by interval length; length k only needs lengths k-1 and k-2, so
+two rows of O(n) values are kept instead of the O(n^2) table, and nothing copies the
+coin list. The value is then aiScore - pScore + D (or - D when the player moves), and
+ties are broken in the order of actions(): L1, R1, L2, R2, as minimax does.
+"""
+def interval_minimax(state, is_maximizing=True):
+    coins = state.coins
+    n = len(coins)
+    diff = state.aiScore - state.pScore
+    if n == 0:
+        return (diff, None)
+
+    # pairs[lo] = coins[lo] + coins[lo+1], the take of an L2 / R2 move
+    pairs = [a + b for a, b in zip(coins, coins[1:])]
+    # prev2[lo] / prev1[lo]: D for the interval of length k-2 / k-1 starting at lo
+    prev2 = [0] * (n + 2)
+    prev1 = [0] * (n + 1)
+    for k in range(1, n):
+        row = [0] * (n - k + 1)
+        for lo in range(n - k + 1):
+            hi = lo + k - 1
+            best = coins[lo] - prev1[lo + 1]
+            v = coins[hi] - prev1[lo]
+            if v > best:
+                best = v
+            if k >= 2:
+                v = pairs[lo] - prev2[lo + 2]
+                if v > best:
+                    best = v
+                v = pairs[hi - 1] - prev2[lo]
+                if v > best:
+                    best = v
+            row[lo] = best
+        prev2, prev1 = prev1, row
+
+    # the whole line: pick the action, not just the value
+    options = [(('L', 1), coins[0] - prev1[1]),
+               (('R', 1), coins[-1] - prev1[0])]
+    if n >= 2:
+        options.append((('L', 2), pairs[0] - prev2[2]))
+        options.append((('R', 2), pairs[-1] - prev2[0]))
+    best_action, best = options[0]
+    for action, v in options[1:]:
+        if v > best:
+            best_action, best = action, v
+
+    return (diff + best if state.turn == 'ai' else diff - best, best_action)
+
+
+"""
+A minimax solver that keeps its transposition table between calls, so the AI does not
+re-solve the rest of the game on every turn.
+
+A game only ever removes coins from the ends of its line, so every position of it is a
+segment line[lo:hi] of the line it started from. Entries are keyed by the contents of
+the segment, not its place: a polynomial hash of its coins (mod 2^61 - 1) and its
+length, which _key computes in O(1) from prefix hashes of `line`. So any line, in this
+game or a later one, reuses every segment of coins it has in common with the lines
+solved before; a line that is not a segment of the current one just becomes `line`.
+(Two different segments of equal length share a key with probability about 2^-61.)
+As in interval_minimax, the stored value is the best (mover's total - opponent's total)
+still to be collected from the segment, which does not depend on the scores so far or
+on whose turn it is; solve() adds it to (or subtracts it from) aiScore - pScore. The
+table holds at most `max_entries` segments and evicts the least recently used first.
+
+Since every segment of a line is a position reachable from it, a position missing from
+the table is solved by filling in its segments from the shortest up, with no recursion
+(see _fill); the segments already in the table are reused, not solved again.
+
+hits / misses / evictions count table lookups and evictions since the last clear(),
+nodes the positions whose moves were searched; stats() reports them with the hit rate.
+"""
+class MinimaxSolver:
+    def __init__(self, max_entries=DEFAULT_TT_ENTRIES):
+        self.max_entries = max_entries
+        self.table = OrderedDict()
+        self.line = ()
+        self._prefix = [0]  # _prefix[i]: hash of line[:i]
+        self._power = [1]  # _power[k]: _HASH_BASE ** k
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nodes = 0
+
+    def solve(self, state, is_maximizing=True):
+        """
+        Returns the same (value, action) as minimax(state, is_maximizing).
+        """
+        diff = state.aiScore - state.pScore
+        if terminal(state):
+            return (diff, None)
+        best, action = self._fill(*self._segment(state.coins))
+        return (diff + best if state.turn == 'ai' else diff - best, action)
+
+    def _fill(self, lo, hi):
+        # Every segment of line[lo:hi] is a reachable position, so solve them all, by
+        # length as interval_minimax does, taking those already in the table from it.
+        # The rows keep the values of the last two lengths, so evictions mid-fill are
+        # harmless. Returns the entry of line[lo:hi].
+        table = self.table
+        key = self._key(lo, hi)
+        entry = table.get(key)
+        if entry is not None:
+            self.hits += 1
+            table.move_to_end(key)
+            return entry
+
+        line = self.line
+        prefix = self._prefix
+        power = self._power
+        n = hi - lo
+        # prev2[i] / prev1[i]: value of the segment of length k-2 / k-1 starting at lo+i
+        prev2 = [0] * (n + 2)
+        prev1 = [0] * (n + 1)
+        for k in range(1, n + 1):
+            row = [0] * (n - k + 1)
+            for i in range(n - k + 1):
+                a = lo + i
+                b = a + k
+                key = ((prefix[b] - prefix[a] * power[k]) % _HASH_MOD, k)
+                entry = table.get(key)
+                if entry is None:
+                    self.misses += 1
+                    self.nodes += 1
+                    # same order as actions(): L1, R1, L2, R2; ties keep the first
+                    best, action = line[a] - prev1[i + 1], ('L', 1)
+                    v = line[b - 1] - prev1[i]
+                    if v > best:
+                        best, action = v, ('R', 1)
+                    if k >= 2:
+                        v = line[a] + line[a + 1] - prev2[i + 2]
+                        if v > best:
+                            best, action = v, ('L', 2)
+                        v = line[b - 2] + line[b - 1] - prev2[i]
+                        if v > best:
+                            best, action = v, ('R', 2)
+                    entry = (best, action)
+                    self._store(key, entry)
+                else:
+                    self.hits += 1
+                    table.move_to_end(key)
+                row[i] = entry[0]
+            prev2, prev1 = prev1, row
+        return entry
+
+    def _run(self, search):
+        # For the searching subclasses, whose _search is a generator that yields the
+        # arguments of each recursive call and gets its result sent back: runs `search`
+        # and, depth-first, every call it yields, on an explicit stack.
+        stack = [search]
+        result = None
+        while True:
+            try:
+                call = stack[-1].send(result)
+            except StopIteration as done:
+                stack.pop()
+                if not stack:
+                    return done.value
+                result = done.value
+            else:
+                stack.append(self._search(*call))
+                result = None
+
+    def _segment(self, coins):
+        # (lo, hi) of `coins` in self.line; coins that are no segment of it become the line
+        coins = tuple(coins)
+        line = self.line
+        m = len(coins)
+        for lo in range(len(line) - m + 1):
+            # compare the end coins first: most offsets fail there without a slice
+            if line[lo] == coins[0] and line[lo + m - 1] == coins[-1] and line[lo:lo + m] == coins:
+                return (lo, lo + m)
+        self.line = coins
+        self._prefix = prefix = [0]
+        for c in coins:
+            prefix.append((prefix[-1] * _HASH_BASE + c) % _HASH_MOD)
+        power = self._power
+        while len(power) <= m:
+            power.append(power[-1] * _HASH_BASE % _HASH_MOD)
+        return (0, m)
+
+    def _key(self, lo, hi):
+        # table key of the segment line[lo:hi]: (hash of its coins, length)
+        return ((self._prefix[hi] - self._prefix[lo] * self._power[hi - lo]) % _HASH_MOD, hi - lo)
+
+    def _moves(self, lo, hi):
+        # (action, coins taken, segment left), in the order of actions(): L1, R1, L2, R2
+        line = self.line
+        moves = [(('L', 1), line[lo], lo + 1, hi),
+                 (('R', 1), line[hi - 1], lo, hi - 1)]
+        if hi - lo >= 2:
+            moves.append((('L', 2), line[lo] + line[lo + 1], lo + 2, hi))
+            moves.append((('R', 2), line[hi - 2] + line[hi - 1], lo, hi - 2))
+        return moves
+
+    def _store(self, key, entry):
+        self.table[key] = entry
+        if len(self.table) > self.max_entries:
+            self.table.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return dict(
+            entries=len(self.table),
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            nodes=self.nodes,
+            hit_rate=self.hits / lookups if lookups else 0.0,
+        )
+
+    def clear(self):
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nodes = 0
+
+
+
+"""
+MinimaxSolver with alpha-beta pruning, for long coin lines.
+
+The search is negamax over the remaining coins: a position's value is the mover's best
+remaining differential, and each child is searched with the window (alpha, beta)
+mirrored through the coins taken. Moves are tried best-first: the move stored for the
+position in the table, then the others by the value of the coins they take (largest
+first, ties in L1, R1, L2, R2 order). With pvs=True, every move after the first is
+searched with a null window and re-searched only if it beats alpha (principal-variation
+search; coin values must be integers).
+
+A table entry is (value, flag, action). A search cut off by the window only bounds the
+true value, so the flag records what the value is: EXACT, LOWER (the true value is at
+least this) or UPPER (at most this). A LOWER entry ends a later search whose beta it
+reaches, an UPPER entry one whose alpha it does not exceed; otherwise the position is
+searched again, its stored action first.
+
+nodes counts the positions whose moves were searched, cutoffs the searches ended early
+by beta, researches the PVS re-searches. Compare nodes with a MinimaxSolver's on the
+same line to measure the pruning. The value returned by solve() is exact; among equally
+good actions it may return a different one than minimax.
+"""
+class AlphaBetaSolver(MinimaxSolver):
+    def __init__(self, max_entries=DEFAULT_TT_ENTRIES, pvs=False):
+        super().__init__(max_entries)
+        self.pvs = pvs
+        self.cutoffs = 0
+        self.researches = 0
+
+    def solve(self, state, is_maximizing=True):
+        """
+        Returns the value of minimax(state, is_maximizing) and an optimal action.
+        """
+        diff = state.aiScore - state.pScore
+        if terminal(state):
+            return (diff, None)
+        lo, hi = self._segment(state.coins)
+        best, action = self._run(self._search(lo, hi, -math.inf, math.inf))
+        return (diff + best if state.turn == 'ai' else diff - best, action)
+
+    def _search(self, lo, hi, alpha, beta):
+        if lo == hi:
+            return (0, None)
+
+        key = self._key(lo, hi)
+        first = None
+        entry = self.table.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.table.move_to_end(key)
+            value, flag, action = entry
+            if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                return (value, action)
+            first = action
+        else:
+            self.misses += 1
+        self.nodes += 1
+
+        moves = sorted(self._moves(lo, hi), key=lambda m: (m[0] != first, -m[1]))
+        best = -math.inf
+        best_action = None
+        a = alpha
+        for i, (action, take, next_lo, next_hi) in enumerate(moves):
+            if self.pvs and i > 0:
+                v = take - (yield next_lo, next_hi, take - a - 1, take - a)[0]
+                if a < v < beta:
+                    self.researches += 1
+                    v = take - (yield next_lo, next_hi, take - beta, take - a)[0]
+            else:
+                v = take - (yield next_lo, next_hi, take - beta, take - a)[0]
+            if v > best:
+                best, best_action = v, action
+                if v > a:
+                    a = v
+                if a >= beta:
+                    self.cutoffs += 1
+                    break
+
+        if best <= alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._store(key, (best, flag, best_action))
+        return (best, best_action)
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(cutoffs=self.cutoffs, researches=self.researches)
+        return stats
+
+    def clear(self):
+        super().clear()
+        self.cutoffs = 0
+        self.researches = 0
+
+
+
+"""
+Estimated (mover's total - opponent's total) still to be collected from the coins
+coins[lo:hi], for positions where a depth-limited search stops.
+
+With one or two coins left the mover takes them all, so the sum is exact. Otherwise the
+estimate is half of the best two-coin take at either end: on random lines it is within
+about 4 of the exact value on average, where parity-based estimates (the sums of the
+coins at even and odd positions) miss by 7 or more, since a move of either size lets
+the players change the parity.
+"""
+def evaluate(coins, lo=0, hi=None):
+    if hi is None:
+        hi = len(coins)
+    if hi - lo <= 2:
+        return sum(coins[lo:hi])
+    return max(coins[lo] + coins[lo + 1], coins[hi - 2] + coins[hi - 1]) / 2
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+"""
+An iterative-deepening alpha-beta AI with a time budget per move, for coin lines too
+long to solve exhaustively in time.
+
+solve() searches the position to depth 1, 2, 3, ... moves, scoring the positions where
+the search stops with `evaluate`, until `time_budget` seconds have passed, `max_depth`
+is reached or a search reaches the end of every line (depth = number of coins), which
+makes its value exact. It returns the value and move of the deepest search completed;
+depth 1 always completes. The value is an estimate unless `exact` is set.
+
+Table entries are (value, flag, action, depth), bound flags as in AlphaBetaSolver; an
+entry answers a search no deeper than its own, and otherwise its action is tried
+first. The table is kept between moves, so the next move starts from the previous
+searches. depth / exact describe the last solve(); stats() also reports cutoffs.
+
+`stop` may be set to an event (anything with is_set(), e.g. a threading.Event); once
+it is set, the running solve() ends as if its time budget had run out.
+"""
+class IterativeDeepeningSolver(MinimaxSolver):
+    def __init__(self, time_budget=DEFAULT_TIME_BUDGET, max_depth=None,
+                 max_entries=DEFAULT_TT_ENTRIES, evaluate=evaluate):
+        super().__init__(max_entries)
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.evaluate = evaluate
+        self.cutoffs = 0
+        self.depth = 0
+        self.exact = False
+        self.stop = None
+
+    def solve(self, state, is_maximizing=True):
+        """
+        Returns (value, action) of the deepest search finished within the time budget.
+        """
+        diff = state.aiScore - state.pScore
+        self.depth = 0
+        self.exact = terminal(state)
+        if self.exact:
+            return (diff, None)
+
+        lo, hi = self._segment(state.coins)
+        n = hi - lo
+        limit = n if self.max_depth is None else min(self.max_depth, n)
+        deadline = time.perf_counter() + self.time_budget
+        for depth in range(1, limit + 1):
+            try:
+                result = self._run(self._search(lo, hi, depth, -math.inf, math.inf,
+                                                deadline if depth > 1 else None))
+            except _OutOfTime:
+                break
+            best, action = result
+            self.depth = depth
+        # every move takes a coin, so a search as deep as the line is long is exhaustive
+        self.exact = self.depth == n
+        return (diff + best if state.turn == 'ai' else diff - best, action)
+
+    def _search(self, lo, hi, depth, alpha, beta, deadline):
+        if lo == hi:
+            return (0, None)
+        if depth == 0:
+            return (self.evaluate(self.line, lo, hi), None)
+        if deadline is not None and (time.perf_counter() > deadline or
+                                     (self.stop is not None and self.stop.is_set())):
+            raise _OutOfTime
+        # searches past the end of the line are all the same exhaustive search
+        depth = min(depth, hi - lo)
+
+        key = self._key(lo, hi)
+        first = None
+        entry = self.table.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.table.move_to_end(key)
+            value, flag, action, entry_depth = entry
+            if entry_depth >= depth and (flag == EXACT or (flag == LOWER and value >= beta)
+                                         or (flag == UPPER and value <= alpha)):
+                return (value, action)
+            first = action
+        else:
+            self.misses += 1
+        self.nodes += 1
+
+        moves = sorted(self._moves(lo, hi), key=lambda m: (m[0] != first, -m[1]))
+        best = -math.inf
+        best_action = None
+        a = alpha
+        for action, take, next_lo, next_hi in moves:
+            v = take - (yield next_lo, next_hi, depth - 1, take - beta, take - a, deadline)[0]
+            if v > best:
+                best, best_action = v, action
+                if v > a:
+                    a = v
+                if a >= beta:
+                    self.cutoffs += 1
+                    break
+
+        if best <= alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._store(key, (best, flag, best_action, depth))
+        return (best, best_action)
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(cutoffs=self.cutoffs, depth=self.depth, exact=self.exact)
+        return stats
+
+    def clear(self):
+        super().clear()
+        self.cutoffs = 0
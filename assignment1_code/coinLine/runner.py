@@ -3,8 +3,9 @@
 import pygame
 import sys
 import random
-import time
-import coinline_solution as cl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import coinline as cl
 
 # Pygame Setup  ----------------
 pygame.init()
@@ -17,6 +18,7 @@ CLOCK = pygame.time.Clock()
 
 # Coin Details ----------------
 NUM_COINS = 10
+AI_TIME_BUDGET = 0.5  # seconds of search per AI move
 GAP = 20
 COIN_RADIUS = (WIDTH - GAP*(NUM_COINS+2))//(NUM_COINS*2)
 BUTTON_WIDTH = 150
@@ -88,10 +90,49 @@ def handle_player_action(state, label):
         return cl.succ(state, action)
     return state
 
+# --- AI Worker ---
+# The solver only ever runs on the worker thread, one job at a time, so the frame loop
+# keeps drawing and handling events while the AI searches. The main thread never touches
+# the solver directly: even stats() goes through the worker.
+
+def ai_move(solver, state):
+    _, action = solver.solve(state, is_maximizing=True)
+    print("AI depth:", solver.depth, "(exact)" if solver.exact else "")
+    return action
+
+def ponder(solver, state, stop):
+    # On the player's turn: search the AI's position after each reply, likeliest (most
+    # coins taken) first, within one move's budget, so the AI's real search after the
+    # reply starts from a warm table. Setting `stop` (once the player has moved) ends
+    # the search at once, so ai_move queued behind it is not kept waiting.
+    replies = sorted(cl.actions(state), key=lambda a: -sum(
+        state.coins[:a[1]] if a[0] == 'L' else state.coins[-a[1]:]))
+    budget = solver.time_budget
+    solver.time_budget = budget / len(replies)
+    solver.stop = stop
+    try:
+        for action in replies:
+            if stop.is_set():
+                break
+            solver.solve(cl.succ(state, action), is_maximizing=True)
+    finally:
+        solver.time_budget = budget
+        solver.stop = None
+
+def print_stats(future):
+    print("AI table:", future.result())
+
 # --- Main Game Loop ---
 def main():
     initial_coins = [random.randint(1, 15) for _ in range(NUM_COINS)]
     state = cl.State(initial_coins)
+    # one solver for the whole session: its table carries over between moves and games;
+    # each AI move is searched as deep as AI_TIME_BUDGET allows
+    solver = cl.IterativeDeepeningSolver(time_budget=AI_TIME_BUDGET)
+    worker = ThreadPoolExecutor(max_workers=1)
+    ai_future = None      # pending AI move, polled every frame
+    pondered = None       # the player position last handed to ponder()
+    ponder_stop = threading.Event()  # set to cut the running ponder() short
 
     game_over = False
     result_message = ""
@@ -102,6 +143,7 @@ def main():
         if cl.terminal(state) and not game_over:
             win = cl.winner(state)
             game_over = True
+            worker.submit(solver.stats).add_done_callback(print_stats)
             if win.lower() == "player":
                 result_message = "You Win!"
             elif win.lower() == "ai":
@@ -109,13 +151,14 @@ def main():
             else:
                 result_message = "It's a Tie!"
 
-        draw_game(state, result_message)
+        draw_game(state, result_message or ("AI thinking..." if ai_future else ""))
 
         
 
         # click, _, _ = pygame.mouse.get_pressed()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                worker.shutdown(wait=False, cancel_futures=True)
                 pygame.quit()
                 sys.exit()
 
@@ -126,6 +169,9 @@ def main():
                     if rect.collidepoint(event.pos):
                         print("action turn: ", label)
                         state = handle_player_action(state, label)
+                        if cl.player(state) != 'player':
+                            # the move landed: stop pondering before the AI's turn is queued
+                            ponder_stop.set()
 
             # Start new game if game is over and SPACE is pressed
             if game_over and event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
@@ -136,12 +182,19 @@ def main():
 
         # AI Move
         if not game_over and cl.player(state) == 'ai':
-            print("AI turn")
-            pygame.time.delay(500)
-            time.sleep(0.5)
-            _, action = cl.minimax(state, is_maximizing=True)
-            if action:
-                state = cl.succ(state, action)
+            if ai_future is None:
+                print("AI turn")
+                ponder_stop.set()
+                ai_future = worker.submit(ai_move, solver, state)
+            elif ai_future.done():
+                action = ai_future.result()
+                ai_future = None
+                if action:
+                    state = cl.succ(state, action)
+        elif not game_over and cl.player(state) == 'player' and state is not pondered:
+            pondered = state
+            ponder_stop = threading.Event()
+            worker.submit(ponder, solver, state, ponder_stop)
 
 
 
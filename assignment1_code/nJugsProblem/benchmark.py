@@ -0,0 +1,231 @@
+# ============================================================
+# Benchmark — scaling harness for the n-jugs solvers
+# Generates seeded instance families, times every solver on them,
+# and compares against a stored baseline to flag regressions.
+# ============================================================
+
+import argparse
+import json
+import math
+import random
+import statistics
+import sys
+import time
+
+from the3jugs import *
+from solvers import *
+from metrics import SearchMetrics
+
+# IDAStarSearch is left out by default: without a transposition table it re-expands
+# states exponentially on deep or unreachable goals (pass --solvers to include it).
+BENCH_SOLVERS = {
+    "backtracking": BacktrackingSearch,
+    "backtrackingIter": BacktrackingSearchIterative,
+    "bfs": BFSSearch,
+    "dfs": DFSSearch,
+    "bibfs": BidirectionalBFSSearch,
+    "astar": AStarSearch,
+    "idastar": IDAStarSearch,
+    "compact": CompactBFSSearch,
+    "external": ExternalBFSSearch,
+}
+if np is not None:
+    BENCH_SOLVERS["vbfs"] = VectorizedBFSSearch
+DEFAULT_SOLVERS = [name for name in BENCH_SOLVERS if name != "idastar"]
+
+"""
+Returns a goal reachable from the empty start state, found by a random walk
+of `steps` moves (so its BFS depth is at most `steps`).
+"""
+def random_reachable_goal(rng, capacities, steps):
+    problem = NJugsProblem(capacities, [0] * len(capacities))
+    state = problem.start_state()
+    for _ in range(steps):
+        state = problem.succ(state, rng.choice(problem.actions(state)))
+    return list(state)
+
+"""
+Returns a goal that is never reachable: every jug strictly between empty and full,
+while every reachable state has some jug full or empty (see NJugsProblem.feasibility).
+Returns None if some capacity is 1 and no such goal exists.
+"""
+def random_unreachable_goal(rng, capacities):
+    if any(c < 2 for c in capacities):
+        return None
+    return [rng.randint(1, c - 1) for c in capacities]
+
+"""
+Generates instance families: one family per (number of jugs, capacity magnitude),
+each with `per_family` instances whose capacities are drawn from
+[magnitude // 2, magnitude]. About `unreachable_fraction` of the goals are unreachable.
+The same seed always yields the same instances.
+"""
+def generate_instances(seed=0, jug_counts=(2, 3, 4), magnitudes=(5, 10, 15), per_family=3,
+                       unreachable_fraction=0.25):
+    rng = random.Random(seed)
+    instances = []
+    for n in jug_counts:
+        for magnitude in magnitudes:
+            family = f"n{n}-c{magnitude}"
+            for k in range(per_family):
+                capacities = [rng.randint(max(1, magnitude // 2), magnitude) for _ in range(n)]
+                goal = None
+                if rng.random() < unreachable_fraction:
+                    goal = random_unreachable_goal(rng, capacities)
+                reachable = goal is None
+                if reachable:
+                    goal = random_reachable_goal(rng, capacities, steps=rng.randint(4, 4 * magnitude))
+                instances.append(dict(
+                    name=f"{family}-{k}",
+                    family=family,
+                    capacities=capacities,
+                    goal=goal,
+                    reachable=reachable,
+                ))
+    return instances
+
+"""
+Nearest-rank percentile of a non-empty list (p in [0, 100]).
+"""
+def percentile(values, p):
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+"""
+Runs one solver on one instance `warmup` times untimed, then `repeats` times timed,
+and once more under tracemalloc for the memory peak (kept out of the timings since
+tracing slows allocation down). Returns a summary dictionary.
+"""
+def bench_solver(name, instance, repeats=5, warmup=1):
+    cls = BENCH_SOLVERS[name]
+
+    def run(trace_memory=False):
+        problem = NJugsProblem(instance["capacities"], instance["goal"])
+        return cls(problem, metrics=SearchMetrics(trace_memory=trace_memory)).solve()
+
+    for _ in range(warmup):
+        run()
+    times = []
+    expanded = 0
+    for _ in range(repeats):
+        res = run()
+        times.append(res["time"])
+        expanded = res["expanded"]
+    peak = run(trace_memory=True)["peak_mem_bytes"]
+
+    median = statistics.median(times)
+    return dict(
+        solver=name,
+        instance=instance["name"],
+        family=instance["family"],
+        found=res["found"],
+        expanded=expanded,
+        median_time=median,
+        p95_time=percentile(times, 95),
+        nodes_per_sec=(expanded / median) if median > 0 else 0.0,
+        peak_mem_bytes=peak,
+    )
+
+"""
+Benchmarks every solver in `solver_names` on every instance and returns the list
+of per-(solver, instance) summaries.
+"""
+def run_benchmark(instances, solver_names=DEFAULT_SOLVERS, repeats=5, warmup=1, verbose=True):
+    rows = []
+    for instance in instances:
+        for name in solver_names:
+            row = bench_solver(name, instance, repeats=repeats, warmup=warmup)
+            rows.append(row)
+            if verbose:
+                print_row(row)
+    return rows
+
+def print_row(row):
+    print(f"{row['instance']:<12} {row['solver']:<17} median={row['median_time'] * 1e3:9.3f}ms"
+          f" p95={row['p95_time'] * 1e3:9.3f}ms nodes/s={row['nodes_per_sec']:11.0f}"
+          f" mem={row['peak_mem_bytes'] / 1024:9.1f}KiB expanded={row['expanded']}")
+
+"""
+Compares median times against a baseline produced by an earlier run (main() checks
+it was generated with the same GENERATION_PARAMS). Returns a list of (solver, instance, baseline, current) for every
+median that got slower by more than `tolerance` (0.25 = 25%). Timings below
+`min_time` seconds are too noisy to compare and are skipped.
+"""
+def find_regressions(rows, baseline_rows, tolerance=0.25, min_time=1e-3):
+    baseline = {(r["solver"], r["instance"]): r for r in baseline_rows}
+    regressions = []
+    for row in rows:
+        base = baseline.get((row["solver"], row["instance"]))
+        if base is None or base["median_time"] < min_time:
+            continue
+        if row["median_time"] > base["median_time"] * (1 + tolerance):
+            regressions.append((row["solver"], row["instance"], base["median_time"], row["median_time"]))
+    return regressions
+
+# The arguments that decide which instances are generated. A baseline stores them all:
+# instance names like "n3-c8-0" repeat across seeds and settings, so rows from a
+# different generation would be matched up with unrelated instances.
+GENERATION_PARAMS = ("seed", "jugs", "magnitudes", "per_family", "unreachable")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the n-jugs solvers on generated instances.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jugs", type=int, nargs="+", default=[2, 3, 4], help="numbers of jugs")
+    parser.add_argument("--magnitudes", type=int, nargs="+", default=[5, 10, 15], help="largest capacities")
+    parser.add_argument("--per-family", type=int, default=3)
+    parser.add_argument("--unreachable", type=float, default=0.25, help="fraction of unreachable goals")
+    parser.add_argument("--solvers", nargs="+", default=DEFAULT_SOLVERS, choices=list(BENCH_SOLVERS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--baseline", default="benchmark_baseline.json",
+                        help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write this run to the baseline file instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown of the median time before flagging a regression")
+    args = parser.parse_args(argv)
+    params = {key: getattr(args, key) for key in GENERATION_PARAMS}
+
+    baseline = None
+    if not args.save_baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        else:
+            # checked before the run: there is no point timing instances we cannot compare
+            saved = baseline.get("params", {})
+            differ = [key for key in GENERATION_PARAMS if saved.get(key) != params[key]]
+            if differ:
+                for key in differ:
+                    print(f"Baseline has {key}={saved.get(key)}, this run {key}={params[key]}",
+                          file=sys.stderr)
+                print(f"Refusing to compare against {args.baseline}: its instances were generated"
+                      " differently (rerun with the same options, or --save-baseline)", file=sys.stderr)
+                return 2
+
+    instances = generate_instances(args.seed, args.jugs, args.magnitudes, args.per_family, args.unreachable)
+    t0 = time.time()
+    rows = run_benchmark(instances, args.solvers, args.repeats, args.warmup)
+    print(f"\nBenchmarked {len(instances)} instances x {len(args.solvers)} solvers in {time.time() - t0:.1f}s")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(dict(params=params, rows=rows), f, indent=2)
+        print(f"Wrote baseline to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        return 0
+
+    regressions = find_regressions(rows, baseline["rows"], args.tolerance)
+    for solver, instance, before, after in regressions:
+        print(f"REGRESSION {solver} on {instance}: {before * 1e3:.3f}ms -> {after * 1e3:.3f}ms")
+    if not regressions:
+        print("No regressions against the baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# ============================================================
+# All-goals distance table for the n-jugs problem
+# One exhaustive BFS per capacity tuple, cached on disk,
+# then every goal for those capacities is answered by lookup.
+# ============================================================
+
+import os
+import pickle
+import time
+from array import array
+from collections import deque
+
+from the3jugs import *
+
+TABLE_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jug_tables")
+
+# (capacities, symmetry) -> DistanceTable, so a batch run loads each table from disk only once
+_loaded = {}
+
+"""
+Shortest distance from the empty start state to every state, for one capacity tuple.
+
+dist[k] is the BFS depth of the state with encoded key k (-1 if unreachable) and
+parent[k] the encoded key it was first reached from (-1 for the start / unreachable),
+using NJugsProblem.encode. Both are flat arrays of prod(capacity+1) entries.
+
+A symmetric table (the default) is built over NJugsProblem.canonical_key instead, so
+only one state per orbit of equal-capacity jugs is searched and filled in: keys and
+parents are canonical, `reachable` counts orbits, and lookup() maps the path back to
+concrete states ending at the goal.
+"""
+class DistanceTable:
+    def __init__(self, capacities, dist, parent, build_time=0.0, symmetric=False):
+        self.capacities = tuple(int(c) for c in capacities)
+        # the goal is irrelevant here, we only need the state model (encode/decode)
+        self.problem = NJugsProblem(self.capacities, [0] * len(self.capacities))
+        self.dist = dist
+        self.parent = parent
+        self.build_time = build_time
+        self.symmetric = symmetric
+        self.max_depth = max(dist)
+        self.reachable = sum(1 for x in dist if x >= 0)
+
+    @classmethod
+    def build(cls, capacities, symmetry=True):
+        """
+        Run one exhaustive BFS from the start state and record dist / parent for every state
+        (for every canonical state with symmetry=True).
+        """
+        t0 = time.time()
+        problem = NJugsProblem(capacities, [0] * len(capacities))
+        encode = problem.canonical_key if symmetry else problem.encode
+        dist = array('i', [-1]) * problem.num_states
+        parent = array('q', [-1]) * problem.num_states
+
+        start = problem.start_state()
+        start_key = encode(start)
+        dist[start_key] = 0
+        queue = deque([(start, start_key)])
+        while queue:
+            state, state_key = queue.popleft()
+            depth = dist[state_key] + 1
+            for _, next_state, _ in problem.successors(state):
+                key = encode(next_state)
+                if dist[key] < 0:
+                    dist[key] = depth
+                    parent[key] = state_key
+                    queue.append((next_state, key))
+
+        return cls(problem.capacities, dist, parent, build_time=time.time() - t0, symmetric=symmetry)
+
+    @staticmethod
+    def cache_path(capacities, cache_dir=DEFAULT_CACHE_DIR, symmetry=True):
+        name = "-".join(str(int(c)) for c in capacities)
+        if symmetry:
+            name += "-sym"
+        return os.path.join(cache_dir, name + ".pkl")
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(dict(version=TABLE_VERSION, capacities=self.capacities,
+                             dist=self.dist, parent=self.parent, build_time=self.build_time,
+                             symmetric=self.symmetric), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a table written by save(). Returns None if the file is missing or stale.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if data.get("version") != TABLE_VERSION:
+            return None
+        return cls(data["capacities"], data["dist"], data["parent"], build_time=data["build_time"],
+                   symmetric=data["symmetric"])
+
+    @classmethod
+    def load_or_build(cls, capacities, cache_dir=DEFAULT_CACHE_DIR, symmetry=True):
+        """
+        Return the table for `capacities`: from memory, else from the on-disk cache,
+        else by running the exhaustive BFS once and caching the result.
+        """
+        caps = tuple(int(c) for c in capacities)
+        table = _loaded.get((caps, symmetry))
+        if table is not None:
+            return table
+        path = cls.cache_path(caps, cache_dir, symmetry)
+        table = cls.load(path)
+        if table is None or table.capacities != caps or table.symmetric != symmetry:
+            table = cls.build(caps, symmetry)
+            table.save(path)
+        _loaded[(caps, symmetry)] = table
+        return table
+
+    """
+    Answer a single goal by lookup.
+
+    returns a dictionary with the same informatin as BFSSearch. `expanded` is 0 since
+    nothing is searched; `reachable` is the number of states in the table.
+    """
+    def lookup(self, goal):
+        t0 = time.time()
+        goal = tuple(int(g) for g in goal)
+        problem = self.problem
+        encode = problem.canonical_key if self.symmetric else problem.encode
+        found = (len(goal) == problem.n
+                 and all(0 <= g <= c for g, c in zip(goal, self.capacities))
+                 and self.dist[encode(goal)] >= 0)
+
+        path = []
+        if found:
+            key = encode(goal)
+            while key >= 0:
+                path.append(problem.decode(key))
+                key = self.parent[key]
+            path.reverse()
+            if self.symmetric:
+                path = problem.concrete_path(path, end=goal)
+
+        cost = len(path) - 1 if found else float('nan')
+        return dict(
+            best_cost=cost,
+            best_path=path,
+            found=found,
+            expanded=0,
+            time=time.time() - t0,
+            b=0.0,
+            D=self.max_depth,
+            d=cost if found else None,
+            reachable=self.reachable,
+        )
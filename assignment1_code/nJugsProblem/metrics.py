@@ -0,0 +1,118 @@
+# ============================================================
+# Search metrics — one collector shared by every solver
+# ============================================================
+
+import time
+import tracemalloc
+
+"""
+Collects the Part 3 statistics (b, D, d, time) plus resource usage for one solve().
+
+A solver calls start() when it begins, expand() once per expanded state, solution()
+whenever it reaches a goal, and stop() when it is done; report() then returns the
+metrics to merge into the result dictionary. If the solve is interrupted (e.g. by a
+timeout), call stop() anyway: it ends the memory tracing that start() began.
+
+    time= wall-clock seconds
+    cpu_time= process CPU seconds
+    b= average branching factor (children generated / states expanded)
+    D= maximum depth reached
+    d= depth of the shallowest solution found (None if none)
+    peak_frontier= largest frontier (queue, stack, heap or recursion depth)
+    peak_explored= largest explored set / parent map
+    peak_mem_bytes= tracemalloc peak during the solve (None unless trace_memory=True)
+    succ_per_sec= successors generated per second of wall time
+
+tracemalloc slows Python allocation down noticeably, so it is opt-in.
+
+If `progress` is given it is called with a progress event every `progress_every`
+expansions, a dictionary with:
+    nodes= states expanded so far
+    depth, frontier, explored= the values passed with the latest expansion
+    elapsed= wall-clock seconds since start()
+    rate= nodes expanded per second so far
+Solvers that expand a whole level at once (expand_many) report at most once per level,
+so progress_every=1 gives one event per level.
+"""
+class SearchMetrics:
+    def __init__(self, trace_memory=False, progress=None, progress_every=10000):
+        self.trace_memory = trace_memory
+        self.progress = progress
+        self.progress_every = progress_every
+        self._next_progress = progress_every
+        self.nodes_expanded = 0
+        self.total_child_count = 0
+        self.max_depth = 0
+        self.shallowest_solution_depth = None
+        self.peak_frontier = 0
+        self.peak_explored = 0
+        self.peak_mem_bytes = None
+        self.elapsed = 0.0
+        self.cpu_elapsed = 0.0
+        self._started_tracing = False
+        self._running = False
+
+    def start(self):
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._running = True
+
+    def expand(self, depth, child_count, frontier_size, explored_size):
+        self.expand_many(1, depth, child_count, frontier_size, explored_size)
+
+    def expand_many(self, count, depth, child_count, frontier_size, explored_size):
+        # For solvers that expand a whole level at once: `count` states, `child_count` children in total.
+        self.nodes_expanded += count
+        self.total_child_count += child_count
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if explored_size > self.peak_explored:
+            self.peak_explored = explored_size
+        if self.progress is not None and self.nodes_expanded >= self._next_progress:
+            self._next_progress = self.nodes_expanded + self.progress_every
+            elapsed = time.perf_counter() - self._t0
+            self.progress(dict(
+                nodes=self.nodes_expanded,
+                depth=depth,
+                frontier=frontier_size,
+                explored=explored_size,
+                elapsed=elapsed,
+                rate=(self.nodes_expanded / elapsed) if elapsed > 0 else 0.0,
+            ))
+
+    def solution(self, depth):
+        if self.shallowest_solution_depth is None or depth < self.shallowest_solution_depth:
+            self.shallowest_solution_depth = depth
+
+    def stop(self):
+        # a no-op unless running, so a solve interrupted anywhere can always be stopped
+        if not self._running:
+            return
+        self._running = False
+        self.elapsed = time.perf_counter() - self._t0
+        self.cpu_elapsed = time.process_time() - self._cpu0
+        if self.trace_memory:
+            self.peak_mem_bytes = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def report(self):
+        return dict(
+            time=self.elapsed,
+            cpu_time=self.cpu_elapsed,
+            b=(self.total_child_count / self.nodes_expanded) if self.nodes_expanded > 0 else 0.0,
+            D=self.max_depth,
+            d=self.shallowest_solution_depth,
+            peak_frontier=self.peak_frontier,
+            peak_explored=self.peak_explored,
+            peak_mem_bytes=self.peak_mem_bytes,
+            succ_per_sec=(self.total_child_count / self.elapsed) if self.elapsed > 0 else 0.0,
+        )
@@ -1,17 +1,25 @@
-import json
+import sys
 import matplotlib.pyplot as plt
 from pathlib import Path
 
-p = Path(__file__).parent / 'results.json'
-if not p.exists():
-    raise SystemExit(f"results.json not found at {p}")
+from results_stream import iter_results
 
-with open(p, 'r') as f:
-    data = json.load(f)
+# Usage: python plot_jugs.py [results file]
+# Defaults to results.jsonl (written by `runner.py --stream`) if present, else results.json.
+# JSONL files are read one case at a time, so only the plotted metrics are kept in memory.
+here = Path(__file__).parent
+if len(sys.argv) > 1:
+    p = Path(sys.argv[1])
+else:
+    p = here / 'results.jsonl'
+    if not p.exists():
+        p = here / 'results.json'
+if not p.exists():
+    raise SystemExit(f"results file not found at {p}")
 
 # Build arrays keyed by sum of capacities
 cases = []
-for case in data:
+for case in iter_results(p):
     caps = [int(x) for x in case['capacities']]
     s = sum(caps)
     bfs = case.get('bfs', {})
@@ -0,0 +1,118 @@
+# ============================================================
+# Result cache — solved (capacities, goal, solver) instances in SQLite
+# so repeated runner runs skip the searches they have already done.
+# ============================================================
+
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jug_results.sqlite")
+DEFAULT_MAX_ENTRIES = 10000
+
+"""
+Canonical cache key of an instance: capacities and goal as JSON lists of ints, so
+["9", "4"] and [9, 4] hit the same entry. A goal given as several states becomes a
+list of such lists.
+
+(Jug order is kept: permuting the jugs gives an equivalent instance, but DFS-style
+solvers explore it in a different order and may report a different path and cost.
+The order of several goal states is kept for the same reason.)
+"""
+def instance_key(capacities, goal):
+    caps = json.dumps([int(c) for c in capacities], separators=(",", ":"))
+    if isinstance(goal[0], (list, tuple)):
+        goal = [[int(g) for g in state] for state in goal]
+    else:
+        goal = [int(g) for g in goal]
+    return caps, json.dumps(goal, separators=(",", ":"))
+
+"""
+Persistent cache of solve() result dictionaries, keyed by
+(capacities, goal, solver name, solver version).
+
+A solver's version is its VERSION class attribute (see solvers.py): bumping it makes
+every older entry of that solver a miss. At most `max_entries` results are kept;
+the least recently used ones are evicted first. clear() drops everything.
+hits / misses count the lookups made through this object.
+
+Several processes may share one cache file (SQLite locks it), e.g. the workers of
+runner.run_cases_parallel. A ResultCache can be pickled: the copy reopens the same
+file, with its own hit / miss counts.
+"""
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " capacities TEXT NOT NULL, goal TEXT NOT NULL, solver TEXT NOT NULL,"
+                " version INTEGER NOT NULL, result TEXT NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (capacities, goal, solver))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)")
+
+    def get(self, capacities, goal, solver, version):
+        """
+        Return the cached result dictionary, or None (a miss) if there is none for this
+        solver version.
+        """
+        caps, goal = instance_key(capacities, goal)
+        row = self._db.execute(
+            "SELECT result FROM results WHERE capacities = ? AND goal = ? AND solver = ? AND version = ?",
+            (caps, goal, solver, version),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._db:
+            self._db.execute(
+                "UPDATE results SET last_used = ? WHERE capacities = ? AND goal = ? AND solver = ?",
+                (time.time(), caps, goal, solver),
+            )
+        return json.loads(row[0])
+
+    def put(self, capacities, goal, solver, version, result):
+        """
+        Store `result` (replacing any entry of another version), then evict the least
+        recently used entries beyond max_entries.
+        """
+        caps, goal = instance_key(capacities, goal)
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (caps, goal, solver, version, json.dumps(result), time.time()),
+            )
+            self._db.execute(
+                "DELETE FROM results WHERE rowid IN ("
+                " SELECT rowid FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._db:
+            self._db.execute("DELETE FROM results")
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def __getstate__(self):
+        return dict(path=self.path, max_entries=self.max_entries)
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_entries"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
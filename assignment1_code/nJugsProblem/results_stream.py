@@ -0,0 +1,107 @@
+# ============================================================
+# Streaming results — one compact JSON record per line (JSONL)
+# Written as each case finishes, read back lazily.
+# ============================================================
+
+import json
+
+from the3jugs import *
+
+"""
+Turns a path of states [s_0, ..., s*] into the actions that produce it,
+run-length encoded as [[kind, i, j, count], ...] (consecutive identical
+actions are merged). Much smaller than the list of states for long paths.
+"""
+def encode_path_rle(capacities, path):
+    if not path:
+        return []
+    problem = NJugsProblem(capacities, path[0])
+    rle = []
+    for state, next_state in zip(path, path[1:]):
+        state, next_state = tuple(state), tuple(next_state)
+        for action in problem.actions(state):
+            if problem.succ(state, action) == next_state:
+                break
+        else:
+            raise ValueError("No single move leads from {} to {}".format(state, next_state))
+        if rle and tuple(rle[-1][:3]) == action:
+            rle[-1][3] += 1
+        else:
+            rle.append([action[0], action[1], action[2], 1])
+    return rle
+
+"""
+Inverse of encode_path_rle: replays the actions from the empty start state.
+"""
+def decode_path_rle(capacities, rle):
+    problem = NJugsProblem(capacities, [0] * len(capacities))
+    state = problem.start_state()
+    path = [state]
+    for kind, i, j, count in rle:
+        for _ in range(count):
+            state = problem.succ(state, (kind, i, j))
+            path.append(state)
+    return path
+
+"""
+Writes one compact JSON record per case result to `path`, flushing after every
+record, so memory stays flat and a crash loses at most the case in progress.
+An existing file at `path` is overwritten, not appended to.
+
+With rle_paths=True each solver's `best_path` is replaced by `best_path_rle`
+(see encode_path_rle). Records keep the position of the case in the test file
+under "index", since parallel runs write them in completion order.
+"""
+class JsonlResultsWriter:
+    def __init__(self, path, rle_paths=False):
+        self.path = path
+        self.rle_paths = rle_paths
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, index, res):
+        record = dict(res, index=index)
+        if self.rle_paths:
+            for key, value in res.items():
+                if isinstance(value, dict) and "best_path" in value:
+                    value = dict(value)
+                    path = value.pop("best_path")
+                    value["best_path_rle"] = encode_path_rle(res["capacities"], path) if value.get("found") else []
+                    record[key] = value
+        self._f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+"""
+Yields the case results stored in `path` one at a time.
+
+Reads JSONL written by JsonlResultsWriter line by line, or falls back to loading
+a plain results.json list. With expand_paths=True run-length encoded paths are
+turned back into `best_path` state lists.
+"""
+def iter_results(path, expand_paths=False):
+    path = str(path)
+    if not path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            res = json.loads(line)
+            if expand_paths:
+                for value in res.values():
+                    if isinstance(value, dict) and "best_path_rle" in value:
+                        rle = value.pop("best_path_rle")
+                        value["best_path"] = decode_path_rle(res["capacities"], rle) if value.get("found") else []
+            yield res
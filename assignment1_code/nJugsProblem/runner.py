@@ -3,57 +3,253 @@
 # Authors: S. El Alaoui and ChatGPT 5
 # ============================================================
 
+import argparse
 import math
 import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from solvers import *
 from the3jugs import * 
+from distance_table import DistanceTable
+from results_stream import JsonlResultsWriter
+from result_cache import ResultCache, DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES
+from metrics import SearchMetrics
 
+# name in the results dict -> solver class, in the order they are run and printed
+SOLVERS = {
+    "backtracking": BacktrackingSearch,
+    "backtrackingIter": BacktrackingSearchIterative,
+    "bfs": BFSSearch,
+    "dfs": DFSSearch,
+    "bibfs": BidirectionalBFSSearch,
+    "astar": AStarSearch,
+}
+
+"""
+Raised inside a solver when its time budget (see run_solver) runs out.
+"""
+class SolverTimeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise SolverTimeout()
+
+"""
+Runs one solver on a problem and returns its result dictionary.
+
+If `timeout` (seconds) is given the solver is interrupted with SIGALRM once it
+runs out, and a not-found result with timed_out=True is returned instead.
+Must be called from the main thread of a process (which is also where process
+pool workers run their tasks). Platforms without SIGALRM ignore the timeout.
+With trace_memory=True the result also carries the tracemalloc peak (peak_mem_bytes).
+With profile=True the solver runs on a ProfiledProblem and the result carries its
+per-method call counts and times under "profile" (also when it timed out).
+With progress_every=N a progress line is printed every N expansions.
+"""
+def run_solver(name, problem, timeout=None, trace_memory=False, profile=False, progress_every=None):
+    if profile:
+        problem = ProfiledProblem(problem)
+    if progress_every:
+        metrics = SearchMetrics(trace_memory=trace_memory, progress=lambda event: print_progress(name, event),
+                                progress_every=progress_every)
+    else:
+        metrics = SearchMetrics(trace_memory=trace_memory)
+    use_alarm = timeout is not None and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    t0 = time.time()
+    try:
+        res = SOLVERS[name](problem, metrics=metrics).solve()
+        # disarm first: an alarm between here and the finally block would discard the result
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except SolverTimeout:
+        res = empty_result(time.time() - t0)
+        res["timed_out"] = True
+    finally:
+        if use_alarm:
+            try:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            except SolverTimeout:
+                # fired just before it was disarmed, while leaving through another exception
+                pass
+            signal.signal(signal.SIGALRM, previous)
+        # an interrupted solver never stopped its metrics: end its memory tracing here
+        metrics.stop()
+    if trace_memory and res.get("timed_out"):
+        res["peak_mem_bytes"] = metrics.peak_mem_bytes
+    if profile:
+        res["profile"] = problem.report()
+    return res
+
+def print_progress(name, event):
+    print(f"  ... [{name}] nodes={event['nodes']} depth={event['depth']} frontier={event['frontier']}"
+          f" explored={event['explored']} {event['rate']:.0f} nodes/s", flush=True)
+
+"""
+Whether a run uses the result cache: profiling and memory tracing (see run_solver)
+bypass it, so run_case records no "cache" hit/miss counts for them.
 """
-Runs all four algorithms on a test case 
-and returns the results as a dictionary.
+def uses_cache(cache, profile=False, trace_memory=False):
+    return cache is not None and not profile and not trace_memory
+
+"""
+Runs all the algorithms in SOLVERS (or only those named in `solvers`)
+on a test case and returns the results as a dictionary.
 
     ** Modify ** it to track the:
         execution time
     for each algorithm and add it to their respective 
     dictionaries (bt_res, bti_res, bfs_res and dfs_res)
 
+With a ResultCache in `cache`, a solver whose result for this instance and its
+current VERSION is cached is not run: the stored result is used, marked cached=True.
+Fresh results are stored (except timed-out ones), and the case records its cache
+"hits" and "misses". Profiling and memory tracing (see run_solver) bypass the cache:
+cached results carry neither "profile" nor peak_mem_bytes, and the results of such
+runs, slowed down by the instrumentation, are not stored.
 """
-def run_case(case):
+def run_case(case, solvers=None, timeout=None, trace_memory=False, cache=None, profile=False,
+             progress_every=None):
     capacities = case["capacities"]
     goal = case["goal"]
+    names = list(SOLVERS) if solvers is None else list(solvers)
 
     problem = NJugsProblem(capacities=capacities, goal=goal)
 
-    # Backtracking
-    try:
-        bt = BacktrackingSearch(problem)
-        bt_res = bt.solve()
-    except RecursionError as e:
-        print(f"Caught a RecursionError: {e}")
-        bt_res = dict(best_cost=math.nan, best_path=[], found=False, expanded=0)
+    res = {
+        "name": case.get("name", ""),
+        "capacities": capacities,
+        "start": [0, 0, 0],
+        "goal": goal,
+        "feasible": True,
+    }
+
+    # Skip every search when the goal provably cannot be reached
+    t0 = time.time()
+    feasible, reason = problem.feasibility()
+    if not feasible:
+        elapsed = time.time() - t0
+        res.update(feasible=False, reason=reason)
+        for name in names:
+            res[name] = infeasible_result(reason, elapsed)
+            if name == "bibfs":
+                res[name].update(expanded_forward=0, expanded_backward=0)
+        return res
+
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    use_cache = uses_cache(cache, profile, trace_memory)
+    for name in names:
+        version = SOLVERS[name].VERSION
+        cached = cache.get(capacities, goal, name, version) if use_cache else None
+        if cached is not None:
+            cached["cached"] = True
+            res[name] = cached
+            continue
+        res[name] = run_solver(name, problem, timeout, trace_memory, profile, progress_every)
+        if use_cache and not res[name].get("timed_out"):
+            cache.put(capacities, goal, name, version, res[name])
+    if use_cache:
+        res["cache"] = dict(hits=cache.hits - hits, misses=cache.misses - misses)
+    return res
+
+"""
+A not-found result for a solver that did not search.
+"""
+def empty_result(elapsed):
+    return dict(
+        best_cost=math.nan,
+        best_path=[],
+        found=False,
+        expanded=0,
+        time=elapsed,
+        b=0.0,
+        D=0,
+        d=None,
+    )
+
+"""
+The result every solver reports for a goal rejected by NJugsProblem.feasibility():
+nothing is searched and `reason` says which invariant the goal breaks.
+"""
+def infeasible_result(reason, elapsed):
+    res = empty_result(elapsed)
+    res["reason"] = reason
+    return res
+
+"""
+Runs many test cases on a process pool and yields (index, result) pairs in the
+order they finish, where index is the position of the case in `cases`.
 
-    # Iterative Backtracking
-    bti = BacktrackingSearchIterative(problem)
-    bti_res = bti.solve()
+With fan_out=True each (case, solver) pair is its own task and a case is yielded
+once its last solver finishes; otherwise each case is one task that runs every
+solver in turn. `timeout` is the per-solver time budget in seconds (see run_solver).
+Each worker reopens `cache` (a ResultCache) on the same file.
+"""
+def run_cases_parallel(cases, jobs=None, fan_out=False, timeout=None, trace_memory=False, cache=None,
+                       profile=False, progress_every=None):
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        if not fan_out:
+            futures = {pool.submit(run_case, case, None, timeout, trace_memory, cache, profile, progress_every): idx
+                       for idx, case in enumerate(cases)}
+            for fut in as_completed(futures):
+                yield futures[fut], fut.result()
+            return
 
-    # BFS
-    bfs = BFSSearch(problem)
-    bfs_res = bfs.solve()
+        use_cache = uses_cache(cache, profile, trace_memory)
+        pending = {}  # case index -> partial result, until all of its solvers are done
+        remaining = {}
+        futures = {}
+        for idx, case in enumerate(cases):
+            problem = NJugsProblem(capacities=case["capacities"], goal=case["goal"])
+            if not problem.feasibility()[0]:
+                yield idx, run_case(case)
+                continue
+            pending[idx] = run_case(case, solvers=[])
+            if use_cache:
+                pending[idx]["cache"] = dict(hits=0, misses=0)
+            remaining[idx] = len(SOLVERS)
+            for name in SOLVERS:
+                futures[pool.submit(run_case, case, [name], timeout, trace_memory, cache, profile,
+                                    progress_every)] = (idx, name)
 
-    # DFS
-    dfs = DFSSearch(problem)
-    dfs_res = dfs.solve()
+        for fut in as_completed(futures):
+            idx, name = futures[fut]
+            res = fut.result()
+            pending[idx][name] = res[name]
+            if use_cache:
+                for key in ("hits", "misses"):
+                    pending[idx]["cache"][key] += res["cache"][key]
+            remaining[idx] -= 1
+            if remaining[idx] == 0:
+                # restore the usual solver order within the case
+                res = pending.pop(idx)
+                for key in SOLVERS:
+                    res[key] = res.pop(key)
+                yield idx, res
+
+"""
+Answers a test case from the all-goals distance table of its capacities
+instead of running the solvers. The table is built by a single exhaustive BFS
+the first time a capacity tuple is seen and cached on disk (see distance_table.py),
+so every other goal with the same capacities is a lookup.
+"""
+def run_case_table(case):
+    capacities = case["capacities"]
+    goal = case["goal"]
+
+    table = DistanceTable.load_or_build(capacities)
 
     return {
         "name": case.get("name", ""),
         "capacities": capacities,
         "start": [0, 0, 0],
         "goal": goal,
-        "backtracking": bt_res,
-        "backtrackingIter": bti_res,
-        "bfs": bfs_res,
-        "dfs": dfs_res,
+        "table": table.lookup(goal),
     }
 
 """
@@ -73,12 +269,29 @@ def pretty_print_result(res, show_paths=False):
     print(f" Capacities: {res['capacities']}")
     print(f" Start:      {tuple(res['start'])}")
     print(f" Goal:       {tuple(res['goal'])}")
+    if not res.get("feasible", True):
+        print(f" Infeasible: {res['reason']}")
 
-    for alg in ["backtracking", "backtrackingIter", "bfs", "dfs"]:
+    for alg in list(SOLVERS) + ["table"]:
     # for alg in ["bfs"]:
+        if alg not in res:
+            continue
         r = res[alg]
-        status = "FOUND" if r["found"] else "NO SOLUTION"
+        status = "FOUND" if r["found"] else ("TIMED OUT" if r.get("timed_out") else "NO SOLUTION")
+        if r.get("cached"):
+            status += " (cached)"
         print(f"  [{alg.upper()}] {status} | cost={r['best_cost']} | expanded={r['expanded']}")
+        if "cpu_time" in r:
+            mem = "-" if r["peak_mem_bytes"] is None else f"{r['peak_mem_bytes'] / 1024:.1f}KiB"
+            print(f"   time={r['time']:.4f}s | cpu={r['cpu_time']:.4f}s | b={r['b']:.2f} | D={r['D']} | d={r['d']}"
+                  f" | peak frontier={r['peak_frontier']} | peak explored={r['peak_explored']}"
+                  f" | peak mem={mem} | succ/s={r['succ_per_sec']:.0f}")
+        if alg == "bibfs" and "expanded_forward" in r and "bfs" in res and res["bfs"]["expanded"]:
+            ratio = r["expanded"] / res["bfs"]["expanded"]
+            print(f"   forward={r['expanded_forward']} | backward={r['expanded_backward']} | vs BFS: {ratio:.2f}x")
+        if "profile" in r:
+            print("   profile: " + " | ".join(f"{method} {p['calls']}x {p['time']:.4f}s"
+                                              for method, p in r["profile"].items()))
         if show_paths and r["found"]:
             print(f"   Path length: {len(r['best_path'])-1}")
             print("   Path states:")
@@ -112,22 +325,108 @@ def read_cases_from_json(path):
     return cleaned
 
 """
-DO NOT MODIFY 
-
 Reads test cases from a file, runs all configured search algorithms, and prints the results.
 
+    --table       answer every goal from the cached distance table of its capacities
+                  instead of running the solvers (see run_case_table)
+    --jobs N      run cases on a pool of N worker processes, printing each case as it
+                  finishes; results.json keeps the test file order
+    --fan-out     with --jobs, also run the solvers of a case in parallel
+    --timeout S   give up on a solver after S seconds (reported as timed_out)
+    --trace-memory  record each solver's tracemalloc peak (slows the solvers down);
+                  the result cache is neither read nor written
+    --stream F    write one compact JSON line per finished case to F instead of
+                  collecting everything for results.json (F is overwritten)
+    --rle-paths   with --stream, store paths as run-length encoded actions
+    --cache [F]   reuse solver results stored in the SQLite cache F (default
+                  .jug_results.sqlite) and store new ones (see result_cache.py)
+    --cache-size N  keep at most N cached results, evicting the least recently used
+    --clear-cache   empty the cache before running (invalidates every entry)
+    --profile     record per-method call counts and times of the problem for every
+                  solver (see ProfiledProblem), written to results.json under "profile";
+                  the result cache is neither read nor written
+    --progress N  print a progress line every N expansions of each solver
+
 To add more test cases, edit ``test_cases.json`` and follow the correct formatting (valid JSON, no trailing commas).
 """
-def main():
-    
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the n-jugs solvers on the test cases.")
+    parser.add_argument("--table", action="store_true",
+                        help="answer goals by lookup in a cached all-goals distance table")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes (1 runs everything in this process)")
+    parser.add_argument("--fan-out", action="store_true",
+                        help="with --jobs, run each solver of a case as its own task")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="per-solver time limit in seconds")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record the tracemalloc peak of every solver")
+    parser.add_argument("--stream", metavar="FILE", default=None,
+                        help="write results incrementally as JSON lines to FILE (overwritten)")
+    parser.add_argument("--rle-paths", action="store_true",
+                        help="with --stream, store paths as run-length encoded actions")
+    parser.add_argument("--cache", metavar="FILE", nargs="?", const=DEFAULT_CACHE_PATH, default=None,
+                        help="reuse and store solver results in a SQLite cache")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="maximum number of cached results (least recently used evicted first)")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="with --cache, drop every cached result before running")
+    parser.add_argument("--profile", action="store_true",
+                        help="record call counts and time per problem method for every solver")
+    parser.add_argument("--progress", metavar="N", type=int, default=None,
+                        help="print a progress line every N expansions")
+    args = parser.parse_args(argv)
+
     tc_file = "test_cases.json"
     cases = read_cases_from_json(tc_file)
-    
-    results = []
-    for case in cases:
-        res = run_case(case)
-        results.append(res)
-        pretty_print_result(res)
+
+    cache = None
+    if args.cache:
+        cache = ResultCache(args.cache, args.cache_size)
+        if args.clear_cache:
+            cache.clear()
+    # --profile and --trace-memory bypass the cache: do not hand it to the cases at all
+    run_cache = cache if uses_cache(cache, args.profile, args.trace_memory) else None
+
+    if args.table:
+        finished = ((idx, run_case_table(case)) for idx, case in enumerate(cases))
+    elif args.jobs > 1:
+        finished = run_cases_parallel(cases, args.jobs, args.fan_out, args.timeout, args.trace_memory, run_cache,
+                                      args.profile, args.progress)
+    else:
+        finished = ((idx, run_case(case, timeout=args.timeout, trace_memory=args.trace_memory, cache=run_cache,
+                                   profile=args.profile, progress_every=args.progress))
+                    for idx, case in enumerate(cases))
+
+    hits = misses = 0
+    by_index = {}
+    if args.stream and os.path.exists(args.stream) and os.path.getsize(args.stream) > 0:
+        print(f"Warning: overwriting the existing results in {args.stream}")
+    writer = JsonlResultsWriter(args.stream, rle_paths=args.rle_paths) if args.stream else None
+    try:
+        for idx, res in finished:
+            if "cache" in res:
+                hits += res["cache"]["hits"]
+                misses += res["cache"]["misses"]
+            if writer is not None:
+                writer.write(idx, res)
+            else:
+                by_index[idx] = res
+            pretty_print_result(res)
+    finally:
+        if writer is not None:
+            writer.close()
+        if cache is not None:
+            cache.close()
+    if cache is not None and run_cache is None:
+        print(f"\nResult cache {args.cache}: not used with --profile or --trace-memory")
+    elif cache is not None:
+        print(f"\nResult cache {args.cache}: {hits} hits, {misses} misses")
+
+    if writer is not None:
+        print(f"\nStreamed results to {args.stream}")
+        return
+    results = [by_index[idx] for idx in range(len(cases))]
 
     # Also write results to a JSON for programmatic grading if desired
     with open("results.json", "w", encoding="utf-8") as f:
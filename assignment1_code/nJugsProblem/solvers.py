@@ -4,201 +4,332 @@
 # Authors: S. El Alaoui and ChatGPT 5
 # ============================================================
 
+import heapq
+import itertools
 import math
+import mmap
+import os
+import shutil
+import tempfile
+from array import array
 from collections import deque
-import time
+
+try:
+    import numpy as np
+except ImportError:  # only VectorizedBFSSearch needs NumPy
+    np = None
 
 from the3jugs import *
+from metrics import SearchMetrics
+
+# Every solver class has a VERSION: bump it whenever a change can alter the results
+# it returns, so stale entries in the on-disk result cache (result_cache.py) are ignored.
+
+"""
+Rebuilds the path [s_0, ..., s*] by following parent pointers back from `key`.
+
+`parents` maps each encoded state to the encoded state it was first reached from
+(None for the start state). Solvers store one pointer per discovered state instead
+of copying the whole path onto the frontier, and only walk back once a goal is found.
+"""
+def reconstruct_path(problem, parents, key):
+    path = []
+    while key is not None:
+        path.append(problem.decode(key))
+        key = parents[key]
+    path.reverse()
+    return path
 
 """
-Depth-first backtracking with simple 'explored' pruning.
-Stores the best (lowest-cost) path of states encountered to any goal.
-This is a recursive implementation. 
+Depth-first branch-and-bound backtracking.
+Stores the best (lowest-cost) path of states encountered to any goal, and that path
+is optimal: instead of a global 'explored' set (which made the reported cost merely
+the cost of whichever path DFS discovered first), every state keeps the cheapest
+cost it has been reached with, and is searched again only when reached more cheaply.
+A partial path is cut off as soon as cost + heuristic(state) reaches the incumbent
+best_cost; `heuristic` must be admissible (see the heuristics in the3jugs.py) and
+defaults to zero_heuristic.
+Parent pointers change whenever a state is reached more cheaply, so the path is
+rebuilt as soon as the incumbent improves rather than at the end.
+Without a bound, DFS first reaches most states along very long paths and then
+re-expands them each time it finds a cheaper one, so the search also runs under a cost
+limit: paths with cost + heuristic above it are cut off too. The search under a limit
+is exhaustive, so a goal found within it is optimal; if none is found the limit is
+doubled (or raised to the smallest cut-off value, if that is larger) and the search
+restarts, until a goal is found or nothing was cut off by the limit.
+This is a recursive implementation, run on an explicit stack of generator frames:
+each call of `recurse` is a generator that yields its recursive calls instead of
+making them, so deep instances never hit the interpreter recursion limit while
+the exploration order stays exactly that of plain recursion.
 
 returns a dictionary with the following informatin: 
     best_cost= path cost (i.e. number of steps from start to the goal),
     best_path= [s_0, ..., s*],
     found= boolean : path found or not 
-    expanded= # of state explored 
+    expanded= # of state expansions, over all cost limits (a state is expanded again
+        when reached more cheaply)
+    plus the metrics of SearchMetrics.report() (time, b, D, d, ...)
         
 """
 class BacktrackingSearch:
-    def __init__(self, problem: SearchProblem):
+    VERSION = 2  # 2: iterative cost limits
+
+    def __init__(self, problem: SearchProblem, heuristic=zero_heuristic, metrics=None):
         self.best_cost = math.inf
         self.best_path = None
-        self.explored = set()
+        self.best_g = {}  # encoded state -> cheapest cost found so far
+        self.parents = {}  # encoded state -> encoded parent on that cheapest path
         self.problem = problem
+        self.heuristic = heuristic
+        self.metrics = metrics if metrics is not None else SearchMetrics()
+        self.limit = math.inf  # cost limit of the current search
+        self.next_limit = math.inf  # smallest cost + heuristic cut off by the limit
 
-    def recurse(self, state, path, cost: int):
+    def recurse(self, state, state_key, cost: int, depth: int):
+        # Yields the arguments of each recursive call; solve() runs them.
         if self.problem.is_end(state):
-       
+            self.metrics.expand(depth, 0, depth + 1, len(self.best_g))
+            self.metrics.solution(depth)
             if cost < self.best_cost:
                 self.best_cost = cost
-                self.best_path = path[:]  # copy
-                # print(self.best_cost)
+                self.best_path = reconstruct_path(self.problem, self.parents, state_key)
             return
 
-        for action in self.problem.actions(state):
-            next_state = self.problem.succ(state, action)
-            key = str(next_state)
-            # key = next_state
-            if key not in self.explored:
-                
-                self.explored.add(key)
-                
-                self.recurse(next_state, path + [next_state], cost + self.problem.cost(state, action))
+        successors = list(self.problem.successors(state))
+        # the recursion stack is this solver's frontier
+        self.metrics.expand(depth, len(successors), depth + 1, len(self.best_g))
+        for _, next_state, step_cost in successors:
+            key = self.problem.encode(next_state)
+            next_cost = cost + step_cost
+            if next_cost >= self.best_g.get(key, math.inf):
+                continue
+            f = next_cost + self.heuristic(self.problem, next_state)
+            if f >= self.best_cost:
+                continue  # bound: cannot beat the incumbent
+            if f > self.limit:
+                self.next_limit = min(self.next_limit, f)
+                continue
+            self.best_g[key] = next_cost
+            self.parents[key] = state_key
+            yield next_state, key, next_cost, depth + 1
 
     def solve(self):
+        self.metrics.start()
         start = self.problem.start_state()
-        self.explored.add(str(start))
-        self.recurse(start, [], 0)
+        start_key = self.problem.encode(start)
+        self.limit = max(self.heuristic(self.problem, start), 1)
+        while True:
+            self.best_g = {start_key: 0}
+            self.parents = {start_key: None}
+            self.next_limit = math.inf
+            stack = [self.recurse(start, start_key, 0, 0)]
+            while stack:
+                call = next(stack[-1], None)
+                if call is None:
+                    stack.pop()  # this frame returned
+                else:
+                    stack.append(self.recurse(*call))
+            if self.best_path is not None or self.next_limit == math.inf:
+                break
+            self.limit = max(2 * self.limit, self.next_limit)
+        self.metrics.stop()
+        found = self.best_path is not None
         return dict(
             best_cost=self.best_cost,
-            best_path=[self.problem.start_state()] + (self.best_path or []),
-            found=(self.best_path is not None),
-            expanded=len(self.explored),
+            best_path=self.best_path if found else [start],
+            found=found,
+            expanded=self.metrics.nodes_expanded,
+            **self.metrics.report(),
         )
 
-    # NOTE (Part 3 - instrumentation guidance):
-    # If you extend this class to collect the metrics required in Part 3,
-    # consider recording the following while searching:
-    #  - total_child_count: sum of number of successor actions generated (for average branching b)
-    #  - nodes_expanded: number of distinct states expanded (same as 'expanded' above)
-    #  - max_depth_seen: maximum path depth reached during recursion (D)
-    #  - shallowest_solution_depth: when is_end is True, record len(path) and keep the minimum (d)
-    #  - elapsed time: use time.time() at entry/exit of solve()
-    # Implementation hint: pass current depth as an int param when recursing and update max/solution depths.
-
 """
-Depth-first backtracking with simple 'explored' pruning (iterative).
-Stores the best (lowest-cost) path of states encountered to any goal.
+Depth-first branch-and-bound backtracking (iterative).
+Same search as BacktrackingSearch: per-state best-known costs instead of an
+'explored' set, partial paths cut off once cost + heuristic(state) reaches the
+incumbent best_cost, the path rebuilt whenever the incumbent improves, and the
+search repeated under doubling cost limits until one contains a goal.
 This is an iterative implementation. 
 
 returns a dictionary with the following informatin: 
     best_cost= path cost (i.e. number of steps from start to the goal),
     best_path= [s_0, ..., s*],
     found= boolean : path found or not 
-    expanded= # of state explored
+    expanded= # of state expansions, over all cost limits (a state is expanded again
+        when reached more cheaply)
+    plus the metrics of SearchMetrics.report() (time, b, D, d, ...)
 
 """
 class BacktrackingSearchIterative:
-    def __init__(self, problem):
+    VERSION = 2  # 2: iterative cost limits
+
+    def __init__(self, problem, heuristic=zero_heuristic, metrics=None):
         self.best_cost = math.inf
         self.best_path = None
-        self.explored = set()
+        self.best_g = {}  # encoded state -> cheapest cost found so far
+        self.parents = {}  # encoded state -> encoded parent on that cheapest path
         self.problem = problem
+        self.heuristic = heuristic
+        self.metrics = metrics if metrics is not None else SearchMetrics()
 
     def solve(self):
-        start = self.problem.start_state()
-        start_key = str(start)
-        self.explored.add(start_key)
+        metrics = self.metrics
+        metrics.start()
+        problem = self.problem
+        start = problem.start_state()
+        start_key = problem.encode(start)
+        limit = max(self.heuristic(problem, start), 1)
+        while True:
+            next_limit = self.search(start, start_key, limit)
+            if self.best_path is not None or next_limit == math.inf:
+                break
+            limit = max(2 * limit, next_limit)
+
+        metrics.stop()
+        found = self.best_path is not None
+        return dict(
+            best_cost=self.best_cost,
+            best_path=self.best_path if found else [start],
+            found=found,
+            expanded=metrics.nodes_expanded,
+            **metrics.report(),
+        )
+
+    def search(self, start, start_key, limit):
+        # One branch-and-bound search under `limit`; returns the smallest
+        # cost + heuristic it cut off for exceeding the limit (inf if none).
+        metrics = self.metrics
+        problem = self.problem
+        heuristic = self.heuristic
+        best_g = self.best_g = {start_key: 0}
+        self.parents = {start_key: None}
+        next_limit = math.inf
 
-        # Stack holds tuples: (state, path_from_after_start, cost_so_far)
-        stack = [(start, [], 0)]
+        # Stack holds tuples: (state, encoded_state, cost_so_far, depth)
+        stack = [(start, start_key, 0, 0)]
 
         while stack:
-            state, path, cost = stack.pop()
+            state, state_key, cost, depth = stack.pop()
+            # Stale entry: reached more cheaply after it was pushed, or no longer able to
+            # beat an incumbent found after it was pushed
+            if cost > best_g[state_key] or cost + heuristic(problem, state) >= self.best_cost:
+                continue
 
             # Goal check
-            if self.problem.is_end(state):
-                if cost < self.best_cost:
-                    self.best_cost = cost
-                    self.best_path = path[:]  # copy
+            if problem.is_end(state):
+                metrics.expand(depth, 0, len(stack), len(best_g))
+                metrics.solution(depth)
+                self.best_cost = cost
+                self.best_path = reconstruct_path(problem, self.parents, state_key)
                 continue
 
             # Expand
-            actions = list(self.problem.actions(state))
+            successors = list(problem.successors(state))
+            metrics.expand(depth, len(successors), len(stack), len(best_g))
             # To match recursive DFS order, push in reverse so first action is explored first.
-            for action in reversed(actions):
-                next_state = self.problem.succ(state, action)
-                key = str(next_state)
-                if key not in self.explored:
-                    self.explored.add(key)
-                    next_cost = cost + self.problem.cost(state, action)
-                    stack.append((next_state, path + [next_state], next_cost))
-
-        return dict(
-            best_cost=self.best_cost,
-            best_path=[self.problem.start_state()] + (self.best_path or []),
-            found=(self.best_path is not None),
-            expanded=len(self.explored),
-        )
+            for _, next_state, step_cost in reversed(successors):
+                key = problem.encode(next_state)
+                next_cost = cost + step_cost
+                if next_cost >= best_g.get(key, math.inf):
+                    continue
+                f = next_cost + heuristic(problem, next_state)
+                if f >= self.best_cost:
+                    continue  # bound: cannot beat the incumbent
+                if f > limit:
+                    next_limit = min(next_limit, f)
+                    continue
+                best_g[key] = next_cost
+                self.parents[key] = state_key
+                stack.append((next_state, key, next_cost, depth + 1))
+        return next_limit
 
 
 """
 Add an iterative implementation of DFS.
 BFS explores nodes level by leveland is guaranteed to find a goal at minimum depth (the fewest steps).
+With symmetry=True the explored set is keyed on NJugsProblem.canonical_key, so only one
+state per orbit of interchangeable (equal-capacity) jugs is expanded, and the goal test
+accepts any permutation of the goal; the path is then mapped back to concrete states
+ending exactly at the goal (NJugsProblem.concrete_path). Symmetry needs goal states:
+a predicate goal may tell permuted states apart.
+With several goal states (or a predicate goal) one search stops at the nearest of them.
 
 returns a dictionary with the following informatin: 
     best_cost= path cost (i.e. number of steps from start to the goal),
     best_path= [s_0, ..., s*],
     found= boolean : path found or not 
     expanded= # of state explored
+    goal_hit= the goal state reached (None if not found)
+    plus the metrics of SearchMetrics.report() (time, b, D, d, ...)
 """
 class BFSSearch:
-    def __init__(self, problem: SearchProblem):
+    VERSION = 2  # 2: goal sets, goal_hit
+
+    def __init__(self, problem: SearchProblem, symmetry=False, metrics=None):
         self.problem = problem
+        self.symmetry = symmetry
+        self.metrics = metrics if metrics is not None else SearchMetrics()
 
     def solve(self):
-        start = self.problem.start_state()
-        start_key = str(start)
+        problem = self.problem
+        if self.symmetry:
+            if problem.goal_states is None:
+                raise ValueError("BFSSearch(symmetry=True) needs goal states, not a predicate goal")
+            encode = problem.canonical_key
+            # canonical goal -> the first goal state of that orbit
+            goals = {}
+            for goal in problem.goal_states:
+                goals.setdefault(problem.canonical(goal), goal)
+            is_end = lambda state: problem.canonical(state) in goals
+        else:
+            encode = problem.encode
+            is_end = problem.is_end
+        start = problem.start_state()
+        start_key = encode(start)
 
         # Metrics for Part 3
-        t0 = time.time()
-        total_child_count = 0
-        nodes_expanded = 0
-        max_depth_seen = 0
-        shallowest_solution_depth = None
+        metrics = self.metrics
+        metrics.start()
 
         queue = deque()
-        queue.append((start, []))  # state, path-from-after-start
+        queue.append((start, start_key, 0))  # state, encoded state, depth
 
-        explored = set()
-        explored.add(start_key)
+        explored = {start_key: None}  # encoded state -> encoded parent
 
         while queue:
-            state, path = queue.popleft()
-            depth = len(path)
-            nodes_expanded += 1
-            if depth > max_depth_seen:
-                max_depth_seen = depth
+            state, state_key, depth = queue.popleft()
 
-            if self.problem.is_end(state):
-                d = len(path)
-                shallowest_solution_depth = d if shallowest_solution_depth is None else min(shallowest_solution_depth, d)
-                elapsed = time.time() - t0
-                b = (total_child_count / nodes_expanded) if nodes_expanded > 0 else 0.0
+            if is_end(state):
+                metrics.expand(depth, 0, len(queue), len(explored))
+                metrics.solution(depth)
+                metrics.stop()
+                path = reconstruct_path(problem, explored, state_key)
+                if self.symmetry:
+                    path = problem.concrete_path(path, end=goals[problem.canonical(state)])
                 return dict(
-                    best_cost=len(path),
-                    best_path=[self.problem.start_state()] + path,
+                    best_cost=depth,
+                    best_path=path,
                     found=True,
                     expanded=len(explored),
-                    time=elapsed,
-                    b=b,
-                    D=max_depth_seen,
-                    d=shallowest_solution_depth,
+                    goal_hit=path[-1],
+                    **metrics.report(),
                 )
 
-            actions = list(self.problem.actions(state))
-            total_child_count += len(actions)
-            for action in actions:
-                next_state = self.problem.succ(state, action)
-                key = str(next_state)
+            successors = list(problem.successors(state))
+            metrics.expand(depth, len(successors), len(queue), len(explored))
+            for _, next_state, _ in successors:
+                key = encode(next_state)
                 if key not in explored:
-                    explored.add(key)
-                    queue.append((next_state, path + [next_state]))
+                    explored[key] = state_key
+                    queue.append((next_state, key, depth + 1))
 
-        elapsed = time.time() - t0
-        b = (total_child_count / nodes_expanded) if nodes_expanded > 0 else 0.0
+        metrics.stop()
         return dict(
             best_cost=float('nan'),
             best_path=[],
             found=False,
             expanded=len(explored),
-            time=elapsed,
-            b=b,
-            D=max_depth_seen,
-            d=shallowest_solution_depth,
+            goal_hit=None,
+            **metrics.report(),
         )
 
 """
@@ -211,73 +342,824 @@ returns a dictionary with the following informatin:
     best_path= [s_0, ..., s*],
     found= boolean : path found or not 
     expanded= # of state explored
+    plus the metrics of SearchMetrics.report() (time, b, D, d, ...)
 """
 class DFSSearch:
+    VERSION = 1
 
-
-    def __init__(self, problem: SearchProblem):
+    def __init__(self, problem: SearchProblem, metrics=None):
         self.problem = problem
+        self.metrics = metrics if metrics is not None else SearchMetrics()
 
     def solve(self):
         start = self.problem.start_state()
-        start_key = str(start)
+        start_key = self.problem.encode(start)
 
         # Metrics for Part 3
-        t0 = time.time()
-        total_child_count = 0
-        nodes_expanded = 0
-        max_depth_seen = 0
-        shallowest_solution_depth = None
+        metrics = self.metrics
+        metrics.start()
 
-        stack = [(start, [])]  # state, path-from-after-start
-        explored = set()
-        explored.add(start_key)
+        stack = [(start, start_key, 0)]  # state, encoded state, depth
+        explored = {start_key: None}  # encoded state -> encoded parent
 
         while stack:
-            state, path = stack.pop()
-            depth = len(path)
-            nodes_expanded += 1
-            if depth > max_depth_seen:
-                max_depth_seen = depth
+            state, state_key, depth = stack.pop()
 
             if self.problem.is_end(state):
-                d = len(path)
-                shallowest_solution_depth = d if shallowest_solution_depth is None else min(shallowest_solution_depth, d)
-                elapsed = time.time() - t0
-                b = (total_child_count / nodes_expanded) if nodes_expanded > 0 else 0.0
+                metrics.expand(depth, 0, len(stack), len(explored))
+                metrics.solution(depth)
+                metrics.stop()
                 return dict(
-                    best_cost=len(path),
-                    best_path=[self.problem.start_state()] + path,
+                    best_cost=depth,
+                    best_path=reconstruct_path(self.problem, explored, state_key),
                     found=True,
                     expanded=len(explored),
-                    time=elapsed,
-                    b=b,
-                    D=max_depth_seen,
-                    d=shallowest_solution_depth,
+                    **metrics.report(),
                 )
 
             # To mimic recursive DFS order, iterate actions in reverse when pushing
-            actions = list(self.problem.actions(state))
-            total_child_count += len(actions)
-            for action in reversed(actions):
-                next_state = self.problem.succ(state, action)
-                key = str(next_state)
+            successors = list(self.problem.successors(state))
+            metrics.expand(depth, len(successors), len(stack), len(explored))
+            for _, next_state, _ in reversed(successors):
+                key = self.problem.encode(next_state)
                 if key not in explored:
-                    explored.add(key)
-                    stack.append((next_state, path + [next_state]))
+                    explored[key] = state_key
+                    stack.append((next_state, key, depth + 1))
 
-        elapsed = time.time() - t0
-        b = (total_child_count / nodes_expanded) if nodes_expanded > 0 else 0.0
+        metrics.stop()
         return dict(
             best_cost=float('nan'),
             best_path=[],
             found=False,
             expanded=len(explored),
-            time=elapsed,
-            b=b,
-            D=max_depth_seen,
-            d=shallowest_solution_depth,
+            **metrics.report(),
+        )
+
+
+
+
+
+"""
+Bidirectional BFS: searches forward from the start state and backward from the goal
+(using NJugsProblem.predecessors) one full layer at a time, always growing the smaller
+frontier, and stops at the layer where the two searches meet.
+Finds a shortest path while expanding far fewer states than BFSSearch on large instances.
+With several goal states the backward search starts from all of them at once; a
+predicate goal has no states to search back from and is rejected with ValueError.
+
+returns a dictionary with the same informatin as BFSSearch, plus:
+    expanded_forward= # of states discovered by the forward search
+    expanded_backward= # of states discovered by the backward search
+(D is the sum of the depths reached by the two searches)
+"""
+class BidirectionalBFSSearch:
+    VERSION = 2  # 2: goal sets, goal_hit
+
+    def __init__(self, problem: SearchProblem, metrics=None):
+        self.problem = problem
+        self.metrics = metrics if metrics is not None else SearchMetrics()
+
+    def _expand_layer(self, frontier, depth, neighbours, own, other):
+        # Expand one whole layer of one side. Returns the next layer, the number of
+        # children generated, and the best (cost, meeting state) found in this layer.
+        next_frontier = []
+        child_count = 0
+        best = None
+        encode = self.problem.encode
+        for state in frontier:
+            state_key = encode(state)
+            for next_state in neighbours(state):
+                child_count += 1
+                key = encode(next_state)
+                if key in own:
+                    continue
+                own[key] = (state_key, depth + 1)
+                next_frontier.append(next_state)
+                if key in other:
+                    cost = depth + 1 + other[key][1]
+                    if best is None or cost < best[0]:
+                        best = (cost, key)
+        return next_frontier, child_count, best
+
+    def _forward(self, state):
+        return [next_state for _, next_state, _ in self.problem.successors(state)]
+
+    def _backward(self, state):
+        return [prev for _, prev in self.problem.predecessors(state)]
+
+    def solve(self):
+        start = self.problem.start_state()
+        if self.problem.goal_states is None:
+            raise ValueError("BidirectionalBFSSearch needs goal states, not a predicate goal")
+
+        metrics = self.metrics
+        metrics.start()
+
+        # encoded state -> (encoded neighbour towards start / goal, distance from start / to goal)
+        fwd = {self.problem.encode(start): (None, 0)}
+        fwd_frontier = [start]
+        bwd = {}
+        bwd_frontier = []
+        for goal in self.problem.goal_states:
+            # an out-of-range goal has no valid encoding and can never be reached
+            if all(0 <= g <= c for g, c in zip(goal, self.problem.capacities)):
+                bwd[self.problem.encode(goal)] = (None, 0)
+                bwd_frontier.append(goal)
+        fwd_depth = bwd_depth = 0
+
+        start_key = self.problem.encode(start)
+        best = (0, start_key) if start_key in bwd else None
+
+        while best is None and fwd_frontier and bwd_frontier:
+            frontier_size = len(fwd_frontier) + len(bwd_frontier)
+            if len(fwd_frontier) <= len(bwd_frontier):
+                expanded = len(fwd_frontier)
+                fwd_frontier, children, best = self._expand_layer(fwd_frontier, fwd_depth, self._forward, fwd, bwd)
+                fwd_depth += 1
+            else:
+                expanded = len(bwd_frontier)
+                bwd_frontier, children, best = self._expand_layer(bwd_frontier, bwd_depth, self._backward, bwd, fwd)
+                bwd_depth += 1
+            metrics.expand_many(expanded, fwd_depth + bwd_depth, children, frontier_size, len(fwd) + len(bwd))
+
+        if best is not None:
+            metrics.solution(best[0])
+        metrics.stop()
+        result = dict(
+            best_cost=float('nan'),
+            best_path=[],
+            found=False,
+            expanded=len(fwd) + len(bwd),
+            expanded_forward=len(fwd),
+            expanded_backward=len(bwd),
+            goal_hit=None,
+            **metrics.report(),
+        )
+        if best is None:
+            return result
+
+        cost, meet = best
+        # start ... meet, following forward parents
+        path = []
+        key = meet
+        while key is not None:
+            path.append(self.problem.decode(key))
+            key = fwd[key][0]
+        path.reverse()
+        # meet ... goal, following backward parents
+        key = bwd[meet][0]
+        while key is not None:
+            path.append(self.problem.decode(key))
+            key = bwd[key][0]
+
+        result.update(best_cost=cost, best_path=path, found=True, goal_hit=path[-1])
+        return result
+
+
+"""
+Level-by-level BFS over the dense state lattice, written as NumPy array operations.
+Every state is an index into a flat grid of prod(capacity+1) cells (NJugsProblem.encode).
+Each level applies fill(i), empty(i) and every pour(i, j) to the whole frontier at once,
+so the per-level cost is a handful of array ops instead of one succ() call per state.
+
+After solve(), `dist[k]` is the depth of encoded state k (-1 if not reached) and
+`parent[k]` the encoded state it was reached from (-1 for the start / unreached).
+With exhaustive=True the search does not stop at the goal and fills both arrays for
+every reachable state.
+Each new level is tested against the goal in one go: np.isin against the encoded goal
+states, or the predicate's vectorized form (see GoalPredicate) when it has one; a
+plain predicate is called per state. The smallest goal key of the first level that
+has any is reported as goal_hit.
+
+returns a dictionary with the same informatin as BFSSearch.
+"""
+class VectorizedBFSSearch:
+    VERSION = 2  # 2: goal sets, goal_hit
+
+    def __init__(self, problem: SearchProblem, exhaustive=False, metrics=None):
+        if np is None:
+            raise ImportError("VectorizedBFSSearch requires NumPy")
+        self.problem = problem
+        self.exhaustive = exhaustive
+        self.metrics = metrics if metrics is not None else SearchMetrics()
+        self.dist = None
+        self.parent = None
+
+    def _children(self, frontier, coords, caps, weights):
+        # All successors of the frontier, as (child keys, parent keys).
+        n = len(caps)
+        children = []
+        parents = []
+        for i in range(n):
+            # fill(i)
+            mask = coords[i] < caps[i]
+            children.append(frontier[mask] + (caps[i] - coords[i][mask]) * weights[i])
+            parents.append(frontier[mask])
+            # empty(i)
+            mask = coords[i] > 0
+            children.append(frontier[mask] - coords[i][mask] * weights[i])
+            parents.append(frontier[mask])
+        for i in range(n):
+            for j in range(n):
+                if i == j:
+                    continue
+                # pour(i, j)
+                mask = (coords[i] > 0) & (coords[j] < caps[j])
+                transfer = np.minimum(coords[i][mask], caps[j] - coords[j][mask])
+                children.append(frontier[mask] + transfer * (weights[j] - weights[i]))
+                parents.append(frontier[mask])
+        return np.concatenate(children), np.concatenate(parents)
+
+    def _first_goal(self, keys, shape):
+        # The smallest goal among `keys` (sorted encoded states), or None.
+        problem = self.problem
+        if self._goal_keys is not None:
+            mask = np.isin(keys, self._goal_keys)
+        elif getattr(problem.goal_predicate, "vectorized", None) is not None:
+            mask = np.asarray(problem.goal_predicate.vectorized(np.unravel_index(keys, shape)), dtype=bool)
+        else:
+            mask = np.array([problem.is_end(problem.decode(int(k))) for k in keys], dtype=bool)
+        hits = keys[mask]
+        return int(hits[0]) if len(hits) else None
+
+    def solve(self):
+        problem = self.problem
+        start = problem.start_state()
+        shape = tuple(c + 1 for c in problem.capacities)
+        caps = np.array(problem.capacities, dtype=np.int64)
+        # stride of each jug in the encoded key
+        weights = [problem.encode(tuple(int(k == i) for k in range(problem.n))) for i in range(problem.n)]
+
+        metrics = self.metrics
+        metrics.start()
+        depth = 0
+
+        dist = np.full(problem.num_states, -1, dtype=np.int32)
+        parent = np.full(problem.num_states, -1, dtype=np.int64)
+        self.dist, self.parent = dist, parent
+        self._goal_keys = None
+        if problem.goal_states is not None:
+            # out-of-range goals have no valid encoding and can never be reached
+            self._goal_keys = np.array([problem.encode(g) for g in problem.goal_states
+                                        if all(0 <= a <= c for a, c in zip(g, problem.capacities))],
+                                       dtype=np.int64)
+
+        start_key = problem.encode(start)
+        dist[start_key] = 0
+        discovered = 1
+        frontier = np.array([start_key], dtype=np.int64)
+        goal_key = self._first_goal(frontier, shape)
+
+        while len(frontier) and (self.exhaustive or goal_key is None):
+            coords = np.unravel_index(frontier, shape)
+            children, parents = self._children(frontier, coords, caps, weights)
+            metrics.expand_many(len(frontier), depth, len(children), len(frontier), discovered)
+
+            new = dist[children] < 0
+            # np.unique keeps the first occurrence, i.e. the first parent to reach each child
+            frontier, first = np.unique(children[new], return_index=True)
+            if not len(frontier):
+                break
+            depth += 1
+            dist[frontier] = depth
+            parent[frontier] = parents[new][first]
+            discovered += len(frontier)
+            if goal_key is None:
+                goal_key = self._first_goal(frontier, shape)
+
+        # the deepest level reached, as for BFSSearch which also counts the goal level
+        metrics.max_depth = depth
+        if goal_key is not None:
+            metrics.solution(int(dist[goal_key]))
+        metrics.stop()
+        if goal_key is None:
+            return dict(
+                best_cost=float('nan'),
+                best_path=[],
+                found=False,
+                expanded=discovered,
+                goal_hit=None,
+                **metrics.report(),
+            )
+
+        path = []
+        key = goal_key
+        while key >= 0:
+            path.append(problem.decode(int(key)))
+            key = parent[key]
+        path.reverse()
+        return dict(
+            best_cost=int(dist[goal_key]),
+            best_path=path,
+            found=True,
+            expanded=discovered,
+            goal_hit=path[-1],
+            **metrics.report(),
+        )
+
+
+"""
+BFS for state spaces too big for BFSSearch's dict of parents and deque of tuples.
+
+Everything is stored by encoded key (NJugsProblem.encode) in flat, fixed-width arrays:
+  - visited: a bytearray bitmap, one bit per state (num_states / 8 bytes);
+  - frontier: two array('q') buffers, the level being expanded and the next one,
+    swapped after every level (8 bytes per frontier state);
+  - parents: one unsigned int per state ('I', 4 bytes, or 'Q' past 2**32 states), in
+    memory or, with parents_path, in a memory-mapped file the OS pages in and out.
+States are only decoded to tuples while being expanded. 10**8 states take 12.5 MB of
+bitmap plus 400 MB of parents, which can live on disk.
+
+returns a dictionary with the same informatin as BFSSearch, plus:
+    bitmap_bytes= size of the visited bitmap
+    parent_bytes= size of the parent array (in memory or on disk)
+"""
+class CompactBFSSearch:
+    VERSION = 1
+
+    def __init__(self, problem: SearchProblem, parents_path=None, metrics=None):
+        self.problem = problem
+        self.parents_path = parents_path
+        self.metrics = metrics if metrics is not None else SearchMetrics()
+
+    def _parent_array(self, typecode, size):
+        # Returns (parents, mmap or None); a fresh file reads as zeros.
+        if self.parents_path is None:
+            return array(typecode, [0]) * size, None
+        with open(self.parents_path, "w+b") as f:
+            f.truncate(size * array(typecode).itemsize)
+            mm = mmap.mmap(f.fileno(), 0)
+        return memoryview(mm).cast(typecode), mm
+
+    def solve(self):
+        problem = self.problem
+        encode = problem.encode
+        decode = problem.decode
+        metrics = self.metrics
+        metrics.start()
+
+        num_states = problem.num_states
+        visited = bytearray((num_states + 7) // 8)
+        typecode = "I" if num_states <= 2 ** 32 else "Q"
+        parents, mm = self._parent_array(typecode, num_states)
+
+        try:
+            start_key = encode(problem.start_state())
+            visited[start_key >> 3] |= 1 << (start_key & 7)
+            parents[start_key] = start_key  # the start is its own parent
+            discovered = 1
+            frontier = array('q', [start_key])
+            next_frontier = array('q')
+            depth = 0
+            goal_key = None
+
+            while frontier:
+                for state_key in frontier:
+                    state = decode(state_key)
+                    if problem.is_end(state):
+                        metrics.expand(depth, 0, len(frontier) + len(next_frontier), discovered)
+                        goal_key = state_key
+                        break
+                    child_count = 0
+                    for _, next_state, _ in problem.successors(state):
+                        child_count += 1
+                        key = encode(next_state)
+                        bit = 1 << (key & 7)
+                        if not visited[key >> 3] & bit:
+                            visited[key >> 3] |= bit
+                            parents[key] = state_key
+                            next_frontier.append(key)
+                            discovered += 1
+                    metrics.expand(depth, child_count, len(frontier) + len(next_frontier), discovered)
+                if goal_key is not None:
+                    break
+                # swap the buffers, reusing the old level's memory for the level after next
+                frontier, next_frontier = next_frontier, frontier
+                del next_frontier[:]
+                depth += 1
+
+            path = []
+            if goal_key is not None:
+                metrics.solution(depth)
+                key = goal_key
+                while key != start_key:
+                    path.append(decode(key))
+                    key = parents[key]
+                path.append(decode(start_key))
+                path.reverse()
+        finally:
+            if mm is not None:
+                parents.release()
+                mm.close()
+
+        metrics.stop()
+        found = goal_key is not None
+        return dict(
+            best_cost=depth if found else float('nan'),
+            best_path=path,
+            found=found,
+            expanded=discovered,
+            goal_hit=path[-1] if found else None,
+            bitmap_bytes=len(visited),
+            parent_bytes=num_states * array(typecode).itemsize,
+            **metrics.report(),
+        )
+
+
+"""
+External-memory BFS: every BFS layer lives in a sorted file of encoded keys on disk,
+so memory stays bounded by about twice `run_size` keys whatever the size of the state
+space.
+
+Expanding a layer streams its file, buffering the children's keys; every `run_size`
+keys the buffer is sorted, deduplicated and written out as a run. The runs are then
+merged into one sorted stream, at most `fan_in` files at a time: while there are more
+runs than that, groups of `fan_in` runs are merged into longer runs on disk (one pass
+over the children each time). The last merge is scanned against the sorted file of
+every state seen so far: keys not in it form the next layer file, and the same pass
+writes the updated seen file. Every file open during a merge buffers run_size // fan_in
+keys, so a merge holds about run_size keys and fan_in + 3 open files.
+
+Duplicates are removed against all earlier layers, not just the previous two. A
+two-layer window is enough for undirected graphs (every edge joins neighbouring layers),
+but jug moves are not reversible: emptying or filling jumps back to shallow layers.
+Measured with DistanceTable, edges reach back up to 36 layers for (30, 23, 44) and 25
+for (9, 9, 10), nearly the full BFS depth. A two-layer window would let old states back
+in forever. The seen file costs one sequential pass per layer instead.
+`max_layers` bounds the number of layers searched (None: until the search is exhausted).
+
+The path is rebuilt backwards: for each earlier layer, its file is scanned for a state
+with a move to the next state on the path.
+
+returns a dictionary with the same informatin as BFSSearch, plus:
+    layers= # of layers written
+    merge_passes= # of intermediate merge passes (layers with more than fan_in runs)
+    truncated= True if max_layers stopped the search
+    io_bytes_read= bytes read from layer, run and seen files
+    io_bytes_written= bytes written to them
+"""
+class ExternalBFSSearch:
+    VERSION = 2  # 2: bounded fan-in merges
+
+    def __init__(self, problem: SearchProblem, work_dir=None, run_size=1 << 20, fan_in=16, max_layers=None,
+                 metrics=None):
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.problem = problem
+        self.work_dir = work_dir
+        self.run_size = run_size
+        self.fan_in = fan_in
+        self.max_layers = max_layers
+        self.metrics = metrics if metrics is not None else SearchMetrics()
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.merge_passes = 0
+
+    def _read(self, path, chunk=None):
+        # Yields the keys stored in a file, `chunk` (default run_size) at a time.
+        chunk = chunk or self.run_size
+        with open(path, "rb") as f:
+            while True:
+                buf = array('q')
+                try:
+                    buf.fromfile(f, chunk)
+                except EOFError:
+                    pass  # the keys that were there are still read
+                if not buf:
+                    return
+                self.bytes_read += len(buf) * buf.itemsize
+                yield from buf
+
+    def _write(self, path, keys):
+        with _KeyWriter(path, self.run_size) as out:
+            for key in keys:
+                out.append(key)
+        self.bytes_written += out.bytes_written
+        return out.count
+
+    def _expand_layer(self, layer_path, depth, tmp):
+        # Writes the children of a layer as sorted runs; returns their paths.
+        problem = self.problem
+        encode = problem.encode
+        runs = []
+        buf = []
+        for state_key in self._read(layer_path):
+            successors = list(problem.successors(problem.decode(state_key)))
+            self.metrics.expand(depth, len(successors), self._layer_size, self._seen_size)
+            buf.extend(encode(next_state) for _, next_state, _ in successors)
+            if len(buf) >= self.run_size:
+                runs.append(os.path.join(tmp, "run{}".format(len(runs))))
+                self._write(runs[-1], sorted(set(buf)))
+                buf = []
+        if buf:
+            runs.append(os.path.join(tmp, "run{}".format(len(runs))))
+            self._write(runs[-1], sorted(set(buf)))
+        return runs
+
+    def _merge(self, runs, chunk):
+        # Sorted, duplicate-free stream of the keys of at most fan_in sorted runs.
+        merged = heapq.merge(*(self._read(r, chunk) for r in runs))
+        return (key for key, _ in itertools.groupby(merged))
+
+    def _reduce_runs(self, runs, tmp, chunk):
+        # Merges groups of fan_in runs into longer ones until at most fan_in are left.
+        while len(runs) > self.fan_in:
+            merged = []
+            for i in range(0, len(runs), self.fan_in):
+                group = runs[i:i + self.fan_in]
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                merged.append(os.path.join(tmp, "merge{}-{}".format(self.merge_passes, len(merged))))
+                with _KeyWriter(merged[-1], chunk) as out:
+                    for key in self._merge(group, chunk):
+                        out.append(key)
+                self.bytes_written += out.bytes_written
+                for path in group:
+                    os.remove(path)
+            runs = merged
+            self.merge_passes += 1
+        return runs
+
+    def solve(self):
+        problem = self.problem
+        metrics = self.metrics
+        metrics.start()
+        # buffer size of each file open during a merge
+        chunk = max(1, self.run_size // self.fan_in)
+        tmp = tempfile.mkdtemp(prefix="jugs-ext-", dir=self.work_dir)
+        try:
+            start_key = problem.encode(problem.start_state())
+            layers = [os.path.join(tmp, "layer0")]
+            seen_path = os.path.join(tmp, "seen0")
+            self._write(layers[0], [start_key])
+            self._write(seen_path, [start_key])
+            self._layer_size = self._seen_size = 1
+            goal_key = start_key if problem.is_end(problem.start_state()) else None
+            depth = 0
+            truncated = False
+
+            while goal_key is None and self._layer_size:
+                if self.max_layers is not None and depth >= self.max_layers:
+                    truncated = True
+                    break
+                runs = self._reduce_runs(self._expand_layer(layers[-1], depth, tmp), tmp, chunk)
+                depth += 1
+                # sorted, duplicate-free stream of every child key of the layer
+                candidates = self._merge(runs, chunk)
+                layers.append(os.path.join(tmp, "layer{}".format(depth)))
+                new_seen_path = os.path.join(tmp, "seen{}".format(depth))
+                with _KeyWriter(layers[-1], chunk) as layer_out, \
+                        _KeyWriter(new_seen_path, chunk) as seen_out:
+                    seen = self._read(seen_path, chunk)
+                    s = next(seen, None)
+                    for key in candidates:
+                        while s is not None and s < key:
+                            seen_out.append(s)
+                            s = next(seen, None)
+                        if s == key:
+                            continue
+                        layer_out.append(key)
+                        seen_out.append(key)
+                        if goal_key is None and problem.is_end(problem.decode(key)):
+                            goal_key = key
+                    while s is not None:
+                        seen_out.append(s)
+                        s = next(seen, None)
+                self.bytes_written += layer_out.bytes_written + seen_out.bytes_written
+                for path in runs + [seen_path]:
+                    os.remove(path)
+                seen_path = new_seen_path
+                self._layer_size = layer_out.count
+                self._seen_size = seen_out.count
+
+            path = []
+            if goal_key is not None:
+                metrics.expand(depth, 0, self._layer_size, self._seen_size)
+                metrics.solution(depth)
+                path = [problem.decode(goal_key)]
+                for layer in reversed(layers[:depth]):
+                    target = path[-1]
+                    for key in self._read(layer):
+                        state = problem.decode(key)
+                        if any(next_state == target for _, next_state, _ in problem.successors(state)):
+                            path.append(state)
+                            break
+                path.reverse()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        metrics.max_depth = depth
+        metrics.stop()
+        found = goal_key is not None
+        return dict(
+            best_cost=depth if found else float('nan'),
+            best_path=path,
+            found=found,
+            expanded=self._seen_size,
+            goal_hit=path[-1] if found else None,
+            layers=len(layers),
+            merge_passes=self.merge_passes,
+            truncated=truncated,
+            io_bytes_read=self.bytes_read,
+            io_bytes_written=self.bytes_written,
+            **metrics.report(),
+        )
+
+"""
+Buffered writer of int64 keys to a file, flushing every `chunk` keys.
+"""
+class _KeyWriter:
+    def __init__(self, path, chunk):
+        self.chunk = chunk
+        self.count = 0
+        self.bytes_written = 0
+        self._buf = array('q')
+        self._f = open(path, "wb")
+
+    def append(self, key):
+        self._buf.append(key)
+        if len(self._buf) >= self.chunk:
+            self._flush()
+
+    def _flush(self):
+        self._buf.tofile(self._f)
+        self.count += len(self._buf)
+        self.bytes_written += len(self._buf) * self._buf.itemsize
+        self._buf = array('q')
+
+    def close(self):
+        self._flush()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+"""
+A* search: expands states in order of f = g + h, where g is the path cost so far
+(honouring problem.cost) and h an admissible heuristic (see the3jugs.py).
+With an admissible h the first goal popped is optimal. States are re-opened when
+a cheaper path to them is found, so inconsistent heuristics are also handled.
+
+returns a dictionary with the same informatin as BFSSearch.
+(best_cost is the path cost, d the number of moves on that path)
+"""
+class AStarSearch:
+    VERSION = 1
+
+    def __init__(self, problem: SearchProblem, heuristic=fill_empty_heuristic, metrics=None):
+        self.problem = problem
+        self.heuristic = heuristic
+        self.metrics = metrics if metrics is not None else SearchMetrics()
+
+    def solve(self):
+        problem = self.problem
+        h = self.heuristic
+        start = problem.start_state()
+        start_key = problem.encode(start)
+
+        metrics = self.metrics
+        metrics.start()
+
+        tie = itertools.count()  # FIFO among equal f, and never compare states
+        heap = [(h(problem, start), next(tie), 0, 0, start, start_key)]  # f, tie, g, depth, state, key
+        best_g = {start_key: 0}
+        parents = {start_key: None}  # encoded state -> encoded parent
+
+        while heap:
+            _, _, g, depth, state, state_key = heapq.heappop(heap)
+            if g > best_g[state_key]:
+                continue  # stale entry, a cheaper path was found since
+
+            if problem.is_end(state):
+                metrics.expand(depth, 0, len(heap), len(best_g))
+                metrics.solution(depth)
+                metrics.stop()
+                return dict(
+                    best_cost=g,
+                    best_path=reconstruct_path(problem, parents, state_key),
+                    found=True,
+                    expanded=len(best_g),
+                    **metrics.report(),
+                )
+
+            successors = list(problem.successors(state))
+            metrics.expand(depth, len(successors), len(heap), len(best_g))
+            for _, next_state, step_cost in successors:
+                key = problem.encode(next_state)
+                next_g = g + step_cost
+                if next_g < best_g.get(key, math.inf):
+                    best_g[key] = next_g
+                    parents[key] = state_key
+                    heapq.heappush(heap, (next_g + h(problem, next_state), next(tie), next_g, depth + 1, next_state, key))
+
+        metrics.stop()
+        return dict(
+            best_cost=float('nan'),
+            best_path=[],
+            found=False,
+            expanded=len(best_g),
+            **metrics.report(),
         )
 
 
+"""
+IDA*: repeated depth-first searches bounded by f = g + h, raising the bound to the
+smallest f that exceeded it each round. Memory is O(depth) since nothing but the
+current path is stored (states already on the path are skipped to avoid cycles).
+Optimal for an admissible heuristic. Runs on an explicit stack, so deep bounds
+cannot hit the recursion limit.
+
+returns a dictionary with the same informatin as BFSSearch, except that
+expanded= # of node expansions over all rounds (states are re-expanded every round)
+and it also reports iterations= # of bound increases.
+"""
+class IDAStarSearch:
+    VERSION = 1
+
+    def __init__(self, problem: SearchProblem, heuristic=fill_empty_heuristic, metrics=None):
+        self.problem = problem
+        self.heuristic = heuristic
+        self.metrics = metrics if metrics is not None else SearchMetrics()
+
+    def solve(self):
+        problem = self.problem
+        h = self.heuristic
+        start = problem.start_state()
+        self.metrics.start()
+
+        bound = h(problem, start)
+        iterations = 0
+        path = None
+        while True:
+            iterations += 1
+            path, cost, next_bound = self._bounded_dfs(start, bound)
+            if path is not None or next_bound == math.inf:
+                break
+            bound = next_bound
+
+        self.metrics.stop()
+        found = path is not None
+        return dict(
+            best_cost=cost if found else float('nan'),
+            best_path=path if found else [],
+            found=found,
+            expanded=self.metrics.nodes_expanded,
+            iterations=iterations,
+            **self.metrics.report(),
+        )
+
+    def _bounded_dfs(self, start, bound):
+        # Returns (path, cost, None) on success, else (None, None, smallest f above bound).
+        problem = self.problem
+        h = self.heuristic
+        metrics = self.metrics
+        if problem.is_end(start):
+            metrics.expand(0, 0, 1, 1)
+            metrics.solution(0)
+            return [start], 0, None
+
+        next_bound = math.inf
+        path = [start]
+        costs = [0]
+        on_path = {problem.encode(start)}
+        # one iterator over the remaining successors per state on the path
+        successors = list(problem.successors(start))
+        metrics.expand(0, len(successors), 1, 1)
+        stack = [iter(successors)]
+
+        while stack:
+            successor = next(stack[-1], None)
+            if successor is None:
+                stack.pop()
+                on_path.discard(problem.encode(path.pop()))
+                costs.pop()
+                continue
+
+            _, next_state, step_cost = successor
+            key = problem.encode(next_state)
+            if key in on_path:
+                continue
+            g = costs[-1] + step_cost
+            f = g + h(problem, next_state)
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+
+            path.append(next_state)
+            costs.append(g)
+            depth = len(path) - 1
+            if problem.is_end(next_state):
+                metrics.expand(depth, 0, len(path), len(on_path))
+                metrics.solution(depth)
+                return path, g, None
+            on_path.add(key)
+            successors = list(problem.successors(next_state))
+            metrics.expand(depth, len(successors), len(path), len(on_path))
+            stack.append(iter(successors))
 
+        return None, None, next_bound
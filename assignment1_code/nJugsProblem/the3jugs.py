@@ -3,6 +3,11 @@
 # Authors: S. El Alaoui and ChatGPT 5
 # ============================================================
 
+import time
+from functools import reduce
+from math import gcd
+from operator import mul, or_
+
 class SearchProblem:
     def start_state(self):
         raise NotImplementedError()
@@ -19,11 +24,50 @@ class SearchProblem:
     def is_end(self, state):
         raise NotImplementedError()
 
+    def successors(self, state):
+        # (action, next_state, cost) for every action; problems may override with a faster one
+        for action in self.actions(state):
+            yield action, self.succ(state, action), self.cost(state, action)
+
+    def encode(self, state):
+        # hashable key the solvers index states by; problems may pack states into ints
+        return state
+
+    def decode(self, key):
+        return key
+
 
 # Action = of type Tuple[str, int, Optional[int]]  # ('fill', i, None) | ('empty', i, None) | ('pour', i, j)
 # State = of type Tuple[int, ...] 
 
 
+"""
+A goal given as a test on states instead of a list of them, e.g. some_jug_holds(4).
+
+`test(state)` says whether a state (tuple of amounts) is a goal. `vectorized`, if given,
+answers the same question for many states at once: it takes a tuple of n integer arrays
+(the amounts of each jug, as np.unravel_index returns them) and returns a boolean array;
+VectorizedBFSSearch uses it to test a whole BFS level at once.
+Any plain callable works as a predicate goal too, just without the vectorized form.
+"""
+class GoalPredicate:
+    def __init__(self, test, vectorized=None, description=None):
+        self.test = test
+        self.vectorized = vectorized
+        self.description = description
+
+    def __call__(self, state):
+        return self.test(state)
+
+    def __repr__(self):
+        return self.description or "GoalPredicate({!r})".format(self.test)
+
+def some_jug_holds(amount):
+    return GoalPredicate(lambda state: amount in state,
+                         vectorized=lambda coords: reduce(or_, (c == amount for c in coords)),
+                         description="some jug holds {}".format(amount))
+
+
 class NJugsProblem(SearchProblem):
     """
     N-jugs problem with the standard operations:
@@ -33,6 +77,14 @@ class NJugsProblem(SearchProblem):
 
     State is an N-tuple of amounts (non-negative ints).
     Cost per action defaults to 1 (can be changed with cost_per_move).
+
+    The goal is one of:
+      - a single state, e.g. [0, 2, 4];
+      - several acceptable states, e.g. [[0, 2, 4], [4, 2, 0]]: any of them ends the search
+        (goal_states keeps them in order, is_end is one set lookup);
+      - a predicate on states (any callable, see GoalPredicate), e.g. some_jug_holds(4).
+    `goal` is the goal state when there is exactly one, else None; `goal_states` is None
+    for a predicate goal.
     """
 
     def __init__(self, capacities, goal):
@@ -41,23 +93,55 @@ class NJugsProblem(SearchProblem):
             raise ValueError("All capacities must be positive integers.")
 
 
-        if not goal:
-            raise ValueError("Goal must be provided.")
-
-        goal = tuple(int(x) for x in goal)
-        if len(goal) != len(capacities):
-            raise ValueError("Goal length must match number of capacities (", len(capacities), ").")
+        if callable(goal):
+            self.goal_predicate = goal
+            self.goal_states = None
+        else:
+            if goal is None or len(goal) == 0:
+                raise ValueError("Goal must be provided.")
+            goal = list(goal)
+            goals = goal if isinstance(goal[0], (list, tuple)) else [goal]
+            goals = [tuple(int(x) for x in g) for g in goals]
+            for g in goals:
+                if len(g) != len(capacities):
+                    raise ValueError("Goal length must match number of capacities (", len(capacities), ").")
+            self.goal_predicate = None
+            self.goal_states = tuple(dict.fromkeys(goals))  # duplicates removed, order kept
 
         self.capacities = caps
         self.n = len(caps)
-        self._goal = tuple(goal)
+        self._goal = self.goal_states[0] if self.goal_states is not None and len(self.goal_states) == 1 else None
+        self._goal_set = frozenset(self.goal_states) if self.goal_states is not None else None
+        # mixed-radix digits for encode/decode: jug i holds 0..capacities[i]
+        self._radices = tuple(c + 1 for c in caps)
+        weights = []
+        self.num_states = 1
+        for r in reversed(self._radices):
+            weights.append(self.num_states)
+            self.num_states *= r
+        self._weights = tuple(reversed(weights))
+        # per-jug and per-pair data for successors(), with the action tuples built once
+        self._jug_moves = tuple((i, c, ("fill", i, None), ("empty", i, None)) for i, c in enumerate(caps))
+        self._pour_moves = tuple((i, j, caps[j], ("pour", i, j))
+                                 for i in range(self.n) for j in range(self.n) if i != j)
+        # successors() yields the unit cost as is, unless a subclass overrides cost()
+        self._unit_cost = type(self).cost is NJugsProblem.cost
+        # groups of interchangeable jugs (equal capacities, 2+ jugs), for canonical()
+        groups = {}
+        for i, c in enumerate(caps):
+            groups.setdefault(c, []).append(i)
+        self.symmetry_groups = tuple(tuple(g) for g in groups.values() if len(g) > 1)
 
     # ---- SearchProblem API ----
     def start_state(self):
         return tuple(0 for _ in range(self.n))
 
     def is_end(self, state):
-        return state == self._goal
+        if self._goal is not None:
+            return state == self._goal
+        if self._goal_set is not None:
+            return state in self._goal_set
+        return bool(self.goal_predicate(state))
 
     def cost(self, state, action) -> int:
         # Unit cost per move by default 1.
@@ -177,6 +261,241 @@ class NJugsProblem(SearchProblem):
 
         raise ValueError("Unknown action kind: {}".format(kind))
 
+    """
+    Yields (action, next_state, cost) for every valid action on `state`, in the same
+    order as actions().
+
+    This is the fast path the solvers use: it fuses actions() and succ() and skips
+    succ()'s validation, since every action it produces is valid by construction.
+    The action tuples are precomputed in __init__ and shared, not rebuilt per call.
+    actions() and succ() remain the reference (checked) API. The cost is cost(state,
+    action); only when cost() is NJugsProblem's own unit cost is the call skipped.
+    """
+    def successors(self, state):
+        cost = None if self._unit_cost else self.cost
+        for i, cap, fill, empty in self._jug_moves:
+            amount = state[i]
+            if amount < cap:
+                ns = list(state)
+                ns[i] = cap
+                yield fill, tuple(ns), 1 if cost is None else cost(state, fill)
+            if amount > 0:
+                ns = list(state)
+                ns[i] = 0
+                yield empty, tuple(ns), 1 if cost is None else cost(state, empty)
+
+        for i, j, cap_j, pour in self._pour_moves:
+            amount = state[i]
+            if amount == 0 or state[j] >= cap_j:
+                continue
+            transfer = min(amount, cap_j - state[j])
+            ns = list(state)
+            ns[i] = amount - transfer
+            ns[j] += transfer
+            yield pour, tuple(ns), 1 if cost is None else cost(state, pour)
+
+    """
+    Returns every (action, prev_state) pair such that succ(prev_state, action) == state.
+
+    This is the reverse transition model used by backward / bidirectional search.
+    The jug operations are not invertible one-to-one (a fill forgets the old amount,
+    a pour forgets how the water was split), so a state can have many predecessors
+    for the same action. Duplicate pairs are removed.
+    """
+    def predecessors(self, state):
+        """
+        Return a list of (action, prev_state) pairs leading to `state` in one move.
+        """
+        if state is None:
+            return []
+
+        caps = self.capacities
+        preds = []
+        seen = set()
+
+        def add(action, prev):
+            if (action, prev) not in seen:
+                seen.add((action, prev))
+                preds.append((action, prev))
+
+        for i in range(self.n):
+            # fill(i): jug i is now full, before it held anything below capacity
+            if state[i] == caps[i]:
+                for x in range(caps[i]):
+                    ps = list(state)
+                    ps[i] = x
+                    add(("fill", i, None), tuple(ps))
+            # empty(i): jug i is now empty, before it held anything above zero
+            if state[i] == 0:
+                for x in range(1, caps[i] + 1):
+                    ps = list(state)
+                    ps[i] = x
+                    add(("empty", i, None), tuple(ps))
+
+        for i in range(self.n):
+            for j in range(self.n):
+                if i == j:
+                    continue
+                # pour(i, j) ended because jug i ran dry: all of i went into j
+                if state[i] == 0:
+                    for x in range(1, min(state[j], caps[i]) + 1):
+                        ps = list(state)
+                        ps[i] = x
+                        ps[j] = state[j] - x
+                        add(("pour", i, j), tuple(ps))
+                # pour(i, j) ended because jug j filled up: j took (cap_j - y) from i
+                if state[j] == caps[j]:
+                    for y in range(caps[j]):
+                        moved = caps[j] - y
+                        if state[i] + moved > caps[i]:
+                            continue
+                        ps = list(state)
+                        ps[i] = state[i] + moved
+                        ps[j] = y
+                        add(("pour", i, j), tuple(ps))
+
+        return preds
+
+
+    # ---- Feasibility ----
+
+    """
+    Cheap necessary conditions for the goal to be reachable from the empty start state.
+
+    Returns (True, None) if the goal passes every check, else (False, reason).
+    Passing does not guarantee a solution exists; failing guarantees none does:
+      - every amount must lie within its jug's capacity;
+      - fill, empty and pour only ever move multiples of g = gcd(capacities),
+        so every reachable amount is a multiple of g;
+      - after any move at least one jug is full or empty (fill/empty leave the
+        touched jug full/empty, pour leaves the source empty or the target full),
+        and so is the start state.
+    With several goal states the goal is feasible if any of them passes; a predicate
+    goal cannot be checked without searching and always passes.
+    """
+    def feasibility(self):
+        if self.goal_states is None:
+            return True, None
+        reasons = []
+        for goal in self.goal_states:
+            ok, reason = self._state_feasibility(goal)
+            if ok:
+                return True, None
+            reasons.append(reason)
+        if len(reasons) == 1:
+            return False, reasons[0]
+        return False, "none of the {} goal states is reachable (first: {})".format(len(reasons), reasons[0])
+
+    def _state_feasibility(self, goal):
+        for i, (g, c) in enumerate(zip(goal, self.capacities)):
+            if not 0 <= g <= c:
+                return False, "goal amount {} for jug {} is outside [0, {}]".format(g, i, c)
+
+        g = 0
+        for c in self.capacities:
+            g = gcd(g, c)
+        for i, amount in enumerate(goal):
+            if amount % g != 0:
+                return False, "goal amount {} for jug {} is not a multiple of gcd(capacities) = {}".format(amount, i, g)
+
+        if not any(amount == 0 or amount == c for amount, c in zip(goal, self.capacities)):
+            return False, "no jug is full or empty in the goal, but every reachable state has one"
+
+        return True, None
+
+
+    # ---- State encoding ----
+
+    """
+    Maps a state to a compact integer key in [0, num_states) and back.
+
+    The key is the mixed-radix number whose digits are the jug amounts, with
+    base capacities[i] + 1 for jug i (jug 0 is the most significant digit).
+    Solvers use it for their explored sets instead of str(state): small ints
+    hash and compare much faster than strings and take far less memory.
+    """
+    def encode(self, state):
+        return sum(map(mul, state, self._weights))
+
+    def decode(self, key):
+        amounts = []
+        for radix in reversed(self._radices):
+            key, amount = divmod(key, radix)
+            amounts.append(amount)
+        return tuple(reversed(amounts))
+
+
+    # ---- Symmetry ----
+
+    """
+    Jugs with equal capacities are interchangeable: permuting their contents maps
+    every move to a move of the same kind, and the empty start state is left unchanged.
+    So all states in one orbit (the same amounts spread differently over the jugs of
+    a group) have the same distance from the start.
+
+    canonical(state) picks one representative per orbit by sorting the amounts within
+    each group of symmetry_groups (ascending, in jug order), and canonical_key(state)
+    is its encoding. Keying an explored set on canonical_key searches the quotient
+    graph, which is up to k! times smaller for k identical jugs.
+    """
+    def canonical(self, state):
+        if not self.symmetry_groups:
+            return tuple(state)
+        ns = list(state)
+        for group in self.symmetry_groups:
+            if len(group) == 2:
+                i, j = group
+                if ns[i] > ns[j]:
+                    ns[i], ns[j] = ns[j], ns[i]
+            else:
+                for i, amount in zip(group, sorted([ns[i] for i in group])):
+                    ns[i] = amount
+        return tuple(ns)
+
+    def canonical_key(self, state):
+        return self.encode(self.canonical(state))
+
+    """
+    Maps a path of canonical states [c_0, ..., c_k] (c_0 the canonical start) found by a
+    search over canonical keys back to concrete states.
+
+    Replays the path from the start state, at each step taking the first successor whose
+    canonical form is the next c_i. The last state is then some permutation of the wanted
+    end state; if `end` is given, every state of the path is relabelled by the jug
+    permutation that turns the last state into `end`. This permutation only swaps jugs of
+    equal capacity, so the relabelled path is still a valid path from the start.
+    """
+    def concrete_path(self, canonical_path, end=None):
+        state = self.start_state()
+        if self.canonical(state) != tuple(canonical_path[0]):
+            raise ValueError("Canonical path does not begin at the start state")
+        path = [state]
+        for target in canonical_path[1:]:
+            target = tuple(target)
+            for _, next_state, _ in self.successors(state):
+                if self.canonical(next_state) == target:
+                    break
+            else:
+                raise ValueError("No move leads from {} to the orbit of {}".format(state, target))
+            state = next_state
+            path.append(state)
+
+        if end is not None:
+            # perm[i] = the jug whose amount ends up in jug i
+            perm = list(range(self.n))
+            for group in self.symmetry_groups:
+                free = list(group)
+                for i in group:
+                    k = next((k for k in free if state[k] == end[i]), None)
+                    if k is None:
+                        raise ValueError("{} is not a permutation of {}".format(tuple(end), state))
+                    free.remove(k)
+                    perm[i] = k
+            path = [tuple(s[k] for k in perm) for s in path]
+            if path[-1] != tuple(end):
+                raise ValueError("{} is not a permutation of {}".format(tuple(end), state))
+        return path
+
 
     # ---- Helpers ----
 
@@ -188,3 +507,109 @@ class NJugsProblem(SearchProblem):
     def capacities_tuple(self):
         return self.capacities
 
+
+
+# ============================================================
+# Profiling wrapper for any SearchProblem
+# ============================================================
+
+"""
+Wraps a SearchProblem and counts the calls to, and time spent in, each of its
+state-model methods (actions, succ, successors, is_end, encode, ...), so a slow solve
+shows where its time goes. Everything else (capacities, goal_states, ...) is passed
+through, so any solver takes a ProfiledProblem in place of the problem it wraps.
+
+Profiling costs nothing unless used: solvers see a wrapper only when one is passed in.
+successors() is timed until its list of successors is complete (it returns that list).
+Time spent in the solver itself (frontier and explored-set operations) is whatever
+the solve took beyond the total of report().
+
+    profiled = ProfiledProblem(NJugsProblem(...))
+    BFSSearch(profiled).solve()
+    profiled.report()  # {method: {"calls": n, "time": seconds}}, slowest first
+"""
+class ProfiledProblem(SearchProblem):
+    PROFILED = ("start_state", "actions", "cost", "succ", "is_end", "successors", "predecessors",
+                "encode", "decode", "canonical", "canonical_key")
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.calls = {}
+        self.seconds = {}
+        for name in self.PROFILED:
+            method = getattr(problem, name, None)
+            if method is not None:
+                self.calls[name] = 0
+                self.seconds[name] = 0.0
+                setattr(self, name, self._profiled(name, method))
+
+    def _profiled(self, name, method):
+        calls, seconds = self.calls, self.seconds
+        clock = time.perf_counter
+        materialize = name == "successors"
+
+        def profiled(*args):
+            t0 = clock()
+            result = method(*args)
+            if materialize:
+                result = list(result)
+            seconds[name] += clock() - t0
+            calls[name] += 1
+            return result
+        return profiled
+
+    def __getattr__(self, name):
+        # only reached for attributes not set on the wrapper itself
+        return getattr(self.problem, name)
+
+    def report(self):
+        names = sorted((n for n in self.calls if self.calls[n]), key=lambda n: -self.seconds[n])
+        return {n: dict(calls=self.calls[n], time=self.seconds[n]) for n in names}
+
+
+# ============================================================
+# Admissible heuristics for NJugsProblem goals
+# Each takes (problem, state) and returns a lower bound on the number of moves
+# left to the goal, so they are admissible whenever every move costs >= 1.
+# With several goal states the bound is the smallest over them (still admissible
+# and consistent); a predicate goal says nothing about distances, so it gets 0.
+# ============================================================
+
+def zero_heuristic(problem, state):
+    return 0
+
+"""
+One move changes at most two jugs (a pour), so at least ceil(m / 2) moves are needed
+when m jugs differ from the goal. (The raw count m is not admissible: a single pour
+can fix two jugs.)
+"""
+def mismatch_heuristic(problem, state):
+    goals = problem.goal_states
+    if goals is None:
+        return 0
+    best = None
+    for goal in goals:
+        m = sum(1 for a, g in zip(state, goal) if a != g)
+        if best is None or m < best:
+            best = m
+    return (best + 1) // 2
+
+"""
+Refines mismatch_heuristic with the total amount of water: pours conserve it, so if
+the total differs from the goal's, at least one fill/empty is needed, and that move
+fixes at most one jug. With k moves fixing at most 2k - 1 jugs, k >= ceil((m + 1) / 2).
+Consistent for unit costs (one move changes m + [total differs] by at most 2).
+"""
+def fill_empty_heuristic(problem, state):
+    goals = problem.goal_states
+    if goals is None:
+        return 0
+    best = None
+    total = sum(state)
+    for goal in goals:
+        m = sum(1 for a, g in zip(state, goal) if a != g)
+        if total != sum(goal):
+            m += 1
+        if best is None or m < best:
+            best = m
+    return (best + 1) // 2